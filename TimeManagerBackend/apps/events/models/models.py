@@ -14,6 +14,16 @@ class Event(models.Model):
     start = models.DateTimeField()
     end = models.DateTimeField(null=True)
     all_day = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Used by the keyset pagination of the list endpoint
+            models.Index(
+                fields=["creator", "created", "id"],
+                name="events_event_keyset_idx"
+            )
+        ]
 
 
 __all__ = ["Event"]
@@ -17,7 +17,7 @@ class EventsSerializer(HrefModelSerializer):
     class Meta:
         self_view = "events:event-detail"
         model = Event
-        exclude = ["creator", "all_day"]
+        exclude = ["creator", "all_day", "created"]
 
     def to_internal_value(self, data):
         serialized = super().to_internal_value(data)
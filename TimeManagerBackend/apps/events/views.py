@@ -67,5 +67,11 @@ class EventsViewSet(viewsets.ModelViewSet):
                 Q(end__range=(start_date, end_date))
             )
         ).all()
+
+        page = self.paginate_queryset(events)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(events, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,13 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.db import models
-from google.cloud import firestore
 
-from TimeManagerBackend.lib.commons.firestore import (
-    get_firestore, DocumentWrapper
-)
+from ..notes.models import NotesContainer
 
 
-class NotesBoard(models.Model):
+class NotesBoard(NotesContainer):
+    collection_name = "notes__boards"
+
     title = models.CharField(max_length=100)
     owner = models.ForeignKey(
         to=get_user_model(),
@@ -19,17 +18,14 @@ class NotesBoard(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     # groups - on groups side
 
-    @property
-    def notes(self):
-        db = get_firestore()
-        col_query = db.collection(
-            "notes__boards", str(self.pk), "notes"
-        ).order_by(
-            "created", direction=firestore.Query.DESCENDING
-        ).stream()
-        return [DocumentWrapper(d) for d in col_query]
+    def notes_scope(self) -> dict:
+        return {"board_id": self.pk, "group_id": None}
 
     class Meta:
+        indexes = [
+            # Used by the keyset pagination of the list endpoint
+            models.Index(fields=["created", "id"], name="notes_board_keyset_idx")
+        ]
         ordering = ["created"]
 
 
@@ -3,7 +3,7 @@ from rest_framework import serializers
 
 from TimeManagerBackend.apps.users.models.serializers import UserSerializer
 from TimeManagerBackend.lib.commons.href import (
-    SelfHrefField, DeferredCollectionField
+    SelfHrefField, DeferredCollectionField, NextPageHrefField
 )
 from ..groups.serializers import NotesGroupListSerializer
 from ..notes.serializers import BoardNotesSerializer
@@ -27,7 +27,7 @@ class Board(serializers.Serializer):  # noqa
 
 class BoardListMixin(serializers.Serializer):  # noqa
     notes = DeferredCollectionField(
-        queryset_source="notes",
+        queryset_source="note_count",
         view_name="notes:boards-detail",
         lookup_field="id", lookup_url_kwarg="pk",
         referring_field="notes",
@@ -43,7 +43,14 @@ class BoardListMixin(serializers.Serializer):  # noqa
 
 
 class BoardDetailMixin(serializers.Serializer):  # noqa
-    notes = BoardNotesSerializer(many=True, read_only=True)
+    notes = BoardNotesSerializer(
+        many=True, read_only=True, source="first_notes_page.documents"
+    )
+    notes_next = NextPageHrefField(
+        cursor_source="first_notes_page.next_cursor",
+        view_name="notes:boards-notes-list",
+        lookup_field="pk", lookup_url_kwarg="boards_pk"
+    )
     groups = NotesGroupListSerializer(many=True, read_only=True)
 
 
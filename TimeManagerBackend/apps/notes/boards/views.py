@@ -50,9 +50,11 @@ class NotesBoardViewSet(PatchUpdateModelViewSet):
 
     def destroy(self, request: Request, *args, **kwargs):
         instance: NotesBoard = self.get_object()
-        notes = instance.notes
-        for n in notes:
-            n.reference.delete()
+
+        # The groups are removed through the database cascade,
+        # so their notes need to be collected here as well
+        instance.notes_storage.clear([instance, *instance.groups.all()])
+
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
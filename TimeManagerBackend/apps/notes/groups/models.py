@@ -1,12 +1,11 @@
 from django.db import models
-from google.cloud import firestore
 
-from TimeManagerBackend.lib.commons.firestore import (
-    get_firestore, DocumentWrapper
-)
+from ..notes.models import NotesContainer
 
 
-class NotesGroup(models.Model):
+class NotesGroup(NotesContainer):
+    collection_name = "notes__groups"
+
     title = models.CharField(max_length=50)
     color = models.IntegerField()
 
@@ -17,21 +16,20 @@ class NotesGroup(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True)
 
+    def notes_scope(self) -> dict:
+        return {"board_id": self.parent_id, "group_id": self.pk}
+
     class Meta:
         indexes = [
-            models.Index(fields=["parent"])
+            models.Index(fields=["parent"]),
+            # Used by the keyset pagination of the list endpoint,
+            # which always lists the groups of a single board
+            models.Index(
+                fields=["parent", "created", "id"],
+                name="notes_group_keyset_idx"
+            )
         ]
         ordering = ["created"]
 
-    @property
-    def notes(self):
-        db = get_firestore()
-        col_query = db.collection(
-            "notes__groups", str(self.pk), "notes"
-        ).order_by(
-            "created", direction=firestore.Query.DESCENDING
-        ).stream()
-        return [DocumentWrapper(d) for d in col_query]
-
 
 __all__ = ["NotesGroup"]
@@ -2,11 +2,13 @@ from drizm_django_commons.serializers import HexColorField
 from rest_framework import serializers
 
 from TimeManagerBackend.lib.commons.href import (
-    SelfHrefField, DeferredCollectionField
+    SelfHrefField, DeferredCollectionField, NextPageHrefField
 )
 from .models import NotesGroup
 from ..boards.models import NotesBoard
-from ..notes.serializers import GroupNotesSerializer
+from ..notes.serializers import (
+    GROUP_PARENTS_CONTEXT_KEY, GroupNotesSerializer
+)
 
 
 # POST
@@ -26,7 +28,7 @@ class NotesGroupListSerializer(serializers.Serializer):  # noqa
         required=True
     )
     notes = DeferredCollectionField(
-        queryset_source="notes",
+        queryset_source="note_count",
         view_name="notes:boards-detail",
         lookup_field="id", lookup_url_kwarg="pk",
         read_only=True
@@ -34,11 +36,26 @@ class NotesGroupListSerializer(serializers.Serializer):  # noqa
 
 
 class NotesGroupDetailSerializer(NotesGroupListSerializer):  # noqa
-    notes = GroupNotesSerializer(many=True, read_only=True)
+    notes = GroupNotesSerializer(
+        many=True, read_only=True, source="first_notes_page.documents"
+    )
+    notes_next = NextPageHrefField(
+        cursor_source="first_notes_page.next_cursor",
+        view_name="notes:groups-notes-list",
+        lookup_field="pk", lookup_url_kwarg="groups_pk",
+        lookup_chain={"boards_pk": "parent_id"}
+    )
 
     def create(self, validated_data):
         return NotesGroup.objects.create(**validated_data)
 
+    def to_representation(self, instance):
+        # Lets the note hrefs resolve their board without a query
+        self.context.setdefault(GROUP_PARENTS_CONTEXT_KEY, {})[
+            str(instance.pk)
+        ] = instance.parent_id
+        return super().to_representation(instance)
+
     def update(self, instance, validated_data: dict):
         allowed_attrs = ("title", "color")
         for attr in allowed_attrs:
@@ -3,10 +3,10 @@ from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from TimeManagerBackend.lib.commons.firestore import get_firestore
 from TimeManagerBackend.lib.viewsets import PatchUpdateModelViewSet
 from . import serializers
 from .models import NotesGroup
+from ..search.models import NoteSearchEntry
 
 
 # /boards/:id/groups/
@@ -72,20 +72,20 @@ class NotesGroupViewSet(PatchUpdateModelViewSet):
         serializer.is_valid(raise_exception=True)
 
         instance: NotesGroup = self.get_object()
-        notes = instance.notes
         if serializer.data.get("cascade"):
-            for n in notes:
-                n.reference.delete()
+            instance.notes_storage.clear([instance])
         else:
-            db = get_firestore()
-            col_ref = db.collection(
-                "notes__boards", str(instance.parent_id), "notes"
-            )
-            for n in notes:
-                pk = n.pk
-                data = n._snapshot  # noqa private
-                col_ref.document(pk).set(data.to_dict())
-                n.reference.delete()
+            added = instance.notes_storage.move_all(instance, instance.parent)
+            instance.parent.adjust_note_count(added)
+            # The entries would be removed with the group otherwise,
+            # moved notes replace the board notes with the same id
+            moved_ids = NoteSearchEntry.objects.filter(
+                group=instance
+            ).values_list("note_id", flat=True)
+            NoteSearchEntry.objects.filter(
+                **instance.parent.notes_scope(), note_id__in=list(moved_ids)
+            ).delete()
+            NoteSearchEntry.objects.filter(group=instance).update(group=None)
 
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from TimeManagerBackend.lib.commons.firestore import chunked
+from ...models import NotesBoard, NotesGroup
+from ...storage import NOTES_STORAGES, get_notes_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the notes and tombstones of all boards and groups "
+        "from one notes storage to another, in streaming batches. "
+        "Notes that already exist in the target are overwritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", choices=list(NOTES_STORAGES))
+        parser.add_argument("target", choices=list(NOTES_STORAGES))
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Amount of notes that are written at once."
+        )
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Delete the notes of the target that the source lacks."
+        )
+
+    def handle(self, *args, **options):
+        if options["source"] == options["target"]:
+            raise CommandError("The source and target storage must differ.")
+
+        source = get_notes_storage(options["source"])
+        target = get_notes_storage(options["target"])
+        batch_size = options["batch_size"]
+
+        copied = 0
+        for model in (NotesBoard, NotesGroup):
+            for container in model.objects.iterator():
+                if options["clear"]:
+                    target.clear([container])
+
+                for chunk in chunked(source.iter_notes(container), batch_size):
+                    target.import_notes(container, chunk)
+                    copied += len(chunk)
+                for chunk in chunked(
+                        source.iter_tombstones(container), batch_size
+                ):
+                    target.import_tombstones(container, chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {copied} note(s) from {options['source']} "
+            f"to {options['target']}."
+        ))
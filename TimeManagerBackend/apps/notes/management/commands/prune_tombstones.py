@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from TimeManagerBackend.lib.commons.firestore import chunked
+from ...models import NotesBoard, NotesGroup
+from ...storage import get_notes_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the tombstones of notes that were deleted longer ago "
+        "than NOTES_TOMBSTONE_RETENTION. Should be run periodically, "
+        "the changes feed rejects syncs from before the retention window."
+    )
+
+    def handle(self, *args, **options):
+        before = now() - settings.NOTES_TOMBSTONE_RETENTION
+        storage = get_notes_storage()
+
+        pruned = 0
+        for model in (NotesBoard, NotesGroup):
+            for chunk in chunked(model.objects.iterator(), 64):
+                pruned += storage.prune_tombstones(chunk, before)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {pruned} tombstone(s).")
+        )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from TimeManagerBackend.lib.commons.firestore import chunked
+from ...models import NotesBoard, NotesGroup
+from ...storage import get_notes_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the stored note counters of all boards and groups "
+        "from the notes storage, to repair any drift. "
+        "Run it manually, when the counters are known to be off."
+    )
+
+    def handle(self, *args, **options):
+        repaired = 0
+        storage = get_notes_storage()
+        for model in (NotesBoard, NotesGroup):
+            # Groups need their board to know where their notes are stored
+            fields = ["pk", "note_count"] + (
+                ["parent"] if model is NotesGroup else []
+            )
+            containers = model.objects.only(*fields).iterator()
+            for chunk in chunked(containers, 64):
+                counts = storage.count(chunk)
+                for container, actual in zip(chunk, counts):
+                    if actual == container.note_count:
+                        continue
+
+                    with transaction.atomic():
+                        # Adjustments wait for the lock and then apply on
+                        # top of the recount. Writers store the note before
+                        # they adjust, so a note stored just before the
+                        # recount may still be counted twice. Running the
+                        # command again converges on the actual count.
+                        stored = model.objects.select_for_update().filter(
+                            pk=container.pk
+                        ).values_list("note_count", flat=True).first()
+                        actual, = storage.count([container])
+                        if stored is None or stored == actual:
+                            continue
+
+                        model.objects.filter(pk=container.pk).update(
+                            note_count=actual
+                        )
+                    repaired += 1
+                    self.stdout.write(
+                        f"{model.__name__} {container.pk}: "
+                        f"{stored} -> {actual}"
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired {repaired} note counter(s).")
+        )
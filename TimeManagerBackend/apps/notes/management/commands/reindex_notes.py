@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from TimeManagerBackend.lib.commons.firestore import chunked
+from ...models import NotesBoard, NotesGroup, NoteSearchEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the note search index of all boards and groups "
+        "from the notes storage. Writes keep the index up to date, "
+        "so this is only needed once, to backfill it."
+    )
+
+    def handle(self, *args, **options):
+        started = now()
+        indexed = 0
+        for model in (NotesBoard, NotesGroup):
+            for container in model.objects.iterator():
+                ids = []
+                notes = container.iter_notes(
+                    fields=("content", "last_edited")
+                )
+                for chunk in chunked(notes, 500):
+                    NoteSearchEntry.objects.index(container, chunk)
+                    ids.extend(note.id for note in chunk)
+
+                # Entries of notes that are gone from the collection,
+                # those written since are of notes created concurrently
+                NoteSearchEntry.objects.filter(
+                    **container.notes_scope(), last_edited__lt=started
+                ).exclude(note_id__in=ids).delete()
+                indexed += len(ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} note(s).")
+        )
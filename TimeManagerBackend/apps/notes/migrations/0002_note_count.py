@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notesboard',
+            name='note_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notesgroup',
+            name='note_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
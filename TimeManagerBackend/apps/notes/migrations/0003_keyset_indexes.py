@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notesboard',
+            index=models.Index(fields=['created', 'id'], name='notes_board_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notesgroup',
+            index=models.Index(fields=['parent', 'created', 'id'], name='notes_group_keyset_idx'),
+        ),
+    ]
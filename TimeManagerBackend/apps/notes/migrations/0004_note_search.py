@@ -0,0 +1,38 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteSearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.CharField(max_length=36)),
+                ('content', models.TextField()),
+                ('last_edited', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesboard')),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesgroup')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notesearchentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='notes_search_vector_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notesearchentry',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=True), fields=('board', 'note_id'), name='notes_search_board_note_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='notesearchentry',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=False), fields=('group', 'note_id'), name='notes_search_group_note_uniq'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredNote',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.CharField(max_length=36)),
+                ('created', models.DateTimeField()),
+                ('last_edited', models.DateTimeField()),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesboard')),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesgroup')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StoredNoteTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.CharField(max_length=36)),
+                ('deleted', models.DateTimeField()),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesboard')),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='notes.notesgroup')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='storednote',
+            index=models.Index(fields=['board', 'group', '-created', '-note_id'], name='stored_notes_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storednote',
+            index=models.Index(fields=['board', 'group', 'last_edited'], name='stored_notes_changes_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='storednote',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=True), fields=('board', 'note_id'), name='stored_notes_board_note_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='storednote',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=False), fields=('group', 'note_id'), name='stored_notes_group_note_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='storednotetombstone',
+            index=models.Index(fields=['board', 'group', 'deleted'], name='stored_tombstones_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
 from .boards.models import *
 from .groups.models import *
 from .notes.models import *
+from .search.models import *
+from .storage.models import *
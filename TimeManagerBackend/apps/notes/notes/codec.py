@@ -0,0 +1,76 @@
+import zlib
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Separates the name of the codec from the compressed content
+CODEC_MARKER_SEPARATOR = b":"
+
+# Pair of functions that compress and decompress bytes
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+
+def _zlib() -> Codec:
+    return lambda data: zlib.compress(data, 6), zlib.decompress
+
+
+def _zstd() -> Codec:
+    if zstandard is None:
+        raise ImproperlyConfigured(
+            "In order to use the 'zstd' note codec, "
+            "you need to install the 'zstandard' package."
+        )
+    return (
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdDecompressor().decompress
+    )
+
+
+# The codecs by the name that marks the content they compressed
+CODECS: Dict[str, Callable[[], Codec]] = {"zlib": _zlib, "zstd": _zstd}
+
+
+def encode_content(content: Optional[str],
+                   codec: Optional[str] = None,
+                   threshold: Optional[int] = None) -> Union[str, bytes, None]:
+    """
+    Compress note content of at least 'threshold' bytes with 'codec',
+    defaulting to the configured ones. The result is the name of the
+    codec followed by the compressed content, as bytes.
+    Content that is short or does not shrink is kept as it is.
+    """
+    codec = codec or settings.NOTES_CONTENT_CODEC
+    if threshold is None:
+        threshold = settings.NOTES_CONTENT_COMPRESSION_THRESHOLD
+    if not (codec and content):
+        return content
+
+    raw = content.encode("utf-8")
+    if len(raw) < threshold:
+        return content
+
+    compress, _ = CODECS[codec]()
+    encoded = codec.encode("ascii") + CODEC_MARKER_SEPARATOR + compress(raw)
+    return encoded if len(encoded) < len(raw) else content
+
+
+def decode_content(value: Union[str, bytes, None]) -> Optional[str]:
+    """ The plain content of a note, whether it was compressed or not. """
+    if not isinstance(value, bytes):
+        return value
+
+    codec, _, compressed = value.partition(CODEC_MARKER_SEPARATOR)
+    try:
+        _, decompress = CODECS[codec.decode("ascii")]()
+    except (KeyError, UnicodeError):
+        raise ValueError("Unknown note codec.")
+    return decompress(compressed).decode("utf-8")
+
+
+__all__ = ["CODECS", "encode_content", "decode_content"]
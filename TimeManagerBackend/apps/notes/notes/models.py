@@ -1,7 +1,27 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F
+from django.utils.functional import cached_property
 from django.utils.timezone import now
+from google.cloud.firestore import CollectionReference, WriteBatch
 from rest_framework import serializers
 
 from TimeManagerBackend.lib.commons.constrained import VersionConstrainedUUIDField
+from TimeManagerBackend.lib.commons.firestore import (
+    get_firestore,
+    require_exists,
+    Page
+)
+from ..storage import NotesStorage, get_notes_storage
+from ..search.models import NoteSearchEntry
+
+
+# Fields of a note that its representation is made of,
+# the other fields are never fetched for reads
+NOTE_REPRESENTATION_FIELDS = ("last_edited", "edited_by", "content")
 
 
 class Note(serializers.Serializer):  # noqa abstract
@@ -14,4 +34,119 @@ class Note(serializers.Serializer):  # noqa abstract
     content = serializers.CharField(required=False, allow_blank=True)
 
 
-__all__ = ["Note"]
+class NotesContainer(models.Model):
+    """
+    Base for all models that own notes, which are kept by the
+    configured notes storage. Subclasses need to specify the root
+    'collection_name' of their Firestore collections.
+    """
+    collection_name: str
+
+    # Denormalized amount of documents in the notes collection,
+    # this is kept up to date by every path that writes notes
+    note_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def notes_collection(self) -> CollectionReference:
+        db = get_firestore()
+        return db.collection(self.collection_name, str(self.pk), "notes")
+
+    def notes_scope(self) -> dict:
+        """ Board and group of the notes, as they are stored in Postgres. """
+        raise NotImplementedError
+
+    @property
+    def deleted_collection(self) -> CollectionReference:
+        """ Tombstones of deleted notes, keyed by the id of the note. """
+        db = get_firestore()
+        return db.collection(self.collection_name, str(self.pk), "deleted")
+
+    def delete_note_batch(self, pk: str) -> WriteBatch:
+        """
+        Batch that deletes a note and leaves a tombstone for it,
+        failing with 'NotFound' if the note does not exist.
+        """
+        batch = get_firestore().batch()
+        batch.delete(
+            self.notes_collection.document(pk), option=require_exists()
+        )
+        batch.set(self.deleted_collection.document(pk), {"deleted": now()})
+        return batch
+
+    @property
+    def notes_storage(self) -> NotesStorage:
+        return get_notes_storage()
+
+    def move_notes(self,
+                   pks: List[str],
+                   target: "NotesContainer") -> list:
+        """
+        Move notes to 'target' at once, leaving tombstones behind.
+        Moved notes count as edited, so clients syncing the changes
+        of the target pick them up.
+        Raises 'NotFound' and moves nothing, if any of the notes is missing,
+        or 'Conflict' if 'target' has notes with the same ids.
+        """
+        moved = self.notes_storage.move(self, pks, target)
+        self.adjust_note_count(-len(moved))
+        target.adjust_note_count(len(moved))
+        NoteSearchEntry.objects.unindex(self, pks)
+        NoteSearchEntry.objects.index(target, moved)
+        return moved
+
+    def changes_since(self,
+                      since: datetime,
+                      fields: Optional[Iterable[str]] = None) -> Tuple[
+        list, list
+    ]:
+        """
+        Notes that were edited and tombstones of notes
+        that were deleted after 'since', oldest first.
+        """
+        return self.notes_storage.changes_since(self, since, fields)
+
+    @property
+    def notes(self):
+        return self.get_notes()
+
+    def get_notes(self, fields: Optional[Iterable[str]] = None) -> list:
+        """ All notes, newest first, with only 'fields' if given. """
+        return self.notes_storage.get_notes(self, fields=fields)
+
+    def notes_page(self,
+                   cursor: Optional[str] = None,
+                   limit: Optional[int] = None,
+                   fields: Optional[Iterable[str]] = None) -> Page:
+        """
+        Page through the notes, newest first.
+        With 'fields', only those are fetched for every note.
+        """
+        return self.notes_storage.notes_page(
+            self, cursor, limit or settings.NOTES_PAGE_SIZE, fields
+        )
+
+    def iter_notes(self,
+                   cursor: Optional[str] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator:
+        """
+        Lazily stream all notes in the same order as the pages,
+        without holding them in memory at once.
+        """
+        return self.notes_storage.iter_notes(self, cursor, fields)
+
+    @cached_property
+    def first_notes_page(self) -> Page:
+        """ The page of notes that is embedded into the detail views. """
+        return self.notes_page(fields=NOTE_REPRESENTATION_FIELDS)
+
+    def adjust_note_count(self, delta: int) -> None:
+        """ Atomically adjust the stored note counter by 'delta'. """
+        type(self).objects.filter(pk=self.pk).update(
+            note_count=F("note_count") + delta
+        )
+
+
+__all__ = ["NOTE_REPRESENTATION_FIELDS", "Note", "NotesContainer"]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now
 from rest_framework import serializers
@@ -5,20 +6,93 @@ from rest_framework import serializers
 from TimeManagerBackend.apps.users.models.serializers import UserSerializer
 from TimeManagerBackend.lib.commons.constrained import VersionConstrainedUUIDField
 from TimeManagerBackend.lib.commons.defaults import CurrentUserPkDefault
-from TimeManagerBackend.lib.commons.firestore import get_firestore, DocumentWrapper
+from TimeManagerBackend.lib.commons.firestore import MAX_BATCH_SIZE
 from TimeManagerBackend.lib.commons.href import SelfHrefField
+from .codec import decode_content, encode_content
+from .models import NOTE_REPRESENTATION_FIELDS
+from ..search.models import NoteSearchEntry
+from ..storage import get_notes_storage
 from ..boards.models import NotesBoard
 from ..groups.models import NotesGroup
 
 
+# Users that edited notes, shared by pk through the serializer context
+EDITORS_CONTEXT_KEY = "note_editors"
+# Board pks of groups, shared by the group pk through the serializer context
+GROUP_PARENTS_CONTEXT_KEY = "group_parents"
+# Board or group that all notes of a bulk write belong to
+NOTES_PARENT_CONTEXT_KEY = "notes_parent"
+
+
+def get_editors_queryset():
+    return get_user_model().objects.select_related("profile_picture")
+
+
+class NotesListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        notes = list(data)
+        self.child.resolve_editors(notes)
+        return [self.child.to_representation(note) for note in notes]
+
+    def validate(self, attrs):
+        ids = [note.get("id") for note in attrs]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                "Every note may only be written once per request."
+            )
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Upsert all notes at once through the notes storage.
+        The ids of the notes that were new are kept in 'created_ids'.
+        """
+        parent = self.context[NOTES_PARENT_CONTEXT_KEY]
+        upserts = []
+        for data in validated_data:
+            _, pk, changes = self.child.get_upsert(data)
+            upserts.append((pk, changes, data))
+
+        written = parent.notes_storage.upsert_many(parent, upserts)
+        self.created_ids = {note.id for note, created in written if created}
+
+        notes = [note for note, _ in written]
+        if self.created_ids:
+            parent.adjust_note_count(len(self.created_ids))
+        NoteSearchEntry.objects.index(parent, notes)
+        return notes
+
+
 class NotesSerializerMixin:
+    def resolve_editors(self, notes) -> None:
+        """
+        Load the editors of all given notes with a single query,
+        and share them with every note through the serializer context.
+        """
+        editors = self.context.setdefault(  # noqa mixin
+            EDITORS_CONTEXT_KEY, {}
+        )
+        missing = {n.edited_by for n in notes} - editors.keys()
+        if missing:
+            editors.update({
+                u.pk: u for u in get_editors_queryset().filter(pk__in=missing)
+            })
+
+    def get_editor(self, pk):
+        editors = self.context.setdefault(  # noqa mixin
+            EDITORS_CONTEXT_KEY, {}
+        )
+        if pk not in editors:
+            editors[pk] = get_editors_queryset().get(pk=pk)
+        return editors[pk]
+
     def to_representation(self, instance):
         self_ = self.fields.get(  # noqa mixin
             "self"
         ).to_representation(instance)
-        content = instance.content
+        content = decode_content(instance.content)
         edited_by = UserSerializer(
-            get_user_model().objects.get(id=instance.edited_by),
+            self.get_editor(instance.edited_by),
             context=self.context  # noqa mixin
         ).data
         last_edited = serializers.DateTimeField().to_representation(
@@ -33,32 +107,60 @@ class NotesSerializerMixin:
 
     # noinspection PyMethodMayBeStatic
     def update(self, instance, validated_data):
-        instance.reference.set({
+        storage = get_notes_storage()
+        content = validated_data.pop("content")
+        changes = {
             "last_edited": validated_data.pop("last_edited"),
             "edited_by": validated_data.pop("edited_by"),
-            "content": validated_data.pop("content")
-        }, merge=True)
+            "content": (
+                encode_content(content)
+                if storage.compress_content else content
+            )
+        }
+        return storage.update(instance, changes)
 
-        return DocumentWrapper(instance.reference.get())
+    def get_fields(self):
+        fields = super().get_fields()  # noqa mixin
+        # Bulk writes share their parent, which the view already resolved
+        if NOTES_PARENT_CONTEXT_KEY in self.context:  # noqa mixin
+            fields.pop("parent")
+        return fields
 
-    def create(self, validated_data):
-        db = get_firestore()
+    def get_upsert(self, validated_data):
+        """ Split the validated data into the parent, note id and changes. """
         pk = str(validated_data.pop("id"))
-        parent_pk = validated_data.pop("parent").pk
+        parent = validated_data.pop("parent", None) or self.context[  # noqa
+            NOTES_PARENT_CONTEXT_KEY
+        ]
+        if parent.notes_storage.compress_content:
+            validated_data["content"] = encode_content(
+                validated_data.get("content")
+            )
+
+        changes = {
+            "last_edited": validated_data.get("last_edited"),
+            "edited_by": validated_data.get("edited_by"),
+            "content": validated_data.get("content")
+        }
+        return parent, pk, changes
 
-        col_ref = db.collection(
-            self.Meta.collection_name, str(parent_pk), "notes"  # noqa mixin
+    def create(self, validated_data):
+        parent, pk, changes = self.get_upsert(validated_data)
+        note, created = parent.notes_storage.upsert(
+            parent, pk, changes, validated_data
         )
-        doc_ref = col_ref.document(pk)
-        doc_ref.set(validated_data)
-        return DocumentWrapper(doc_ref.get())
+
+        if created:
+            parent.adjust_note_count(1)
+        NoteSearchEntry.objects.index(parent, [note])
+        return note
 
 
 class BoardNotesSerializer(NotesSerializerMixin, serializers.Serializer):
     self = SelfHrefField(
         lookup_field="id",
         lookup_url_kwarg="pk",
-        lookup_chain={"boards_pk": "reference.parent.parent.id"},
+        lookup_chain={"boards_pk": "parent_pk"},
         read_only=True
     )
     id = VersionConstrainedUUIDField(
@@ -76,12 +178,28 @@ class BoardNotesSerializer(NotesSerializerMixin, serializers.Serializer):
     class Meta:
         self_view = "notes:boards-notes"
         collection_name = "notes__boards"
+        list_serializer_class = NotesListSerializer
+        # Only these fields are fetched, when reading notes to render them
+        projection = NOTE_REPRESENTATION_FIELDS
 
 
-def get_boards_pk(obj):
-    parent_id = obj.reference.parent.parent.id
-    group = NotesGroup.objects.get(id=parent_id)
-    return group.parent_id
+def get_boards_pk(obj, serializer_field):
+    """
+    Resolve the board of a group note, preferring the group parents
+    that were already put into the serializer context.
+    """
+    group_pk = obj.parent_pk
+    parents = serializer_field.context.setdefault(
+        GROUP_PARENTS_CONTEXT_KEY, {}
+    )
+    if group_pk not in parents:
+        parents[group_pk] = NotesGroup.objects.values_list(
+            "parent_id", flat=True
+        ).get(id=group_pk)
+    return parents[group_pk]
+
+
+get_boards_pk.requires_context = True
 
 
 class GroupNotesSerializer(NotesSerializerMixin, serializers.Serializer):
@@ -90,7 +208,7 @@ class GroupNotesSerializer(NotesSerializerMixin, serializers.Serializer):
         lookup_url_kwarg="pk",
         lookup_chain={
             "boards_pk": get_boards_pk,
-            "groups_pk": "reference.parent.parent.id"
+            "groups_pk": "parent_pk"
         },
         read_only=True
     )
@@ -109,8 +227,57 @@ class GroupNotesSerializer(NotesSerializerMixin, serializers.Serializer):
     class Meta:
         self_view = "notes:groups-notes"
         collection_name = "notes__groups"
+        list_serializer_class = NotesListSerializer
+        # Only these fields are fetched, when reading notes to render them
+        projection = NOTE_REPRESENTATION_FIELDS
+
+
+class NotesPageQueryParamsSerializer(serializers.Serializer):  # noqa abstract
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.NOTES_MAX_PAGE_SIZE,
+        required=False
+    )
+    # Stream every note after the cursor instead of a single page
+    stream = serializers.BooleanField(default=False)
+
+
+class NotesChangesQueryParamsSerializer(serializers.Serializer):  # noqa abstract
+    since = serializers.DateTimeField(required=True)
+
+    # noinspection PyMethodMayBeStatic
+    def validate_since(self, value):
+        # Deletions before then may have been pruned already
+        if value < now() - settings.NOTES_TOMBSTONE_RETENTION:
+            raise serializers.ValidationError(
+                "Changes are only kept for a limited time, "
+                "all notes have to be fetched again."
+            )
+        return value
+
+
+class NotesMoveSerializer(serializers.Serializer):  # noqa abstract
+    notes = serializers.ListField(
+        child=VersionConstrainedUUIDField(uuid_version=4),
+        min_length=1,
+        # Every note takes a write for the copy, the delete and the tombstone
+        max_length=MAX_BATCH_SIZE // 3
+    )
+    # The group within the same board to move the notes to,
+    # or null to move them to the board itself
+    group = serializers.IntegerField(allow_null=True)
+
+
+class NoteTombstoneSerializer(serializers.Serializer):  # noqa abstract
+    id = serializers.CharField(read_only=True)
+    deleted = serializers.DateTimeField(read_only=True)
 
 
 __all__ = [
-    "BoardNotesSerializer", "GroupNotesSerializer"
+    "GROUP_PARENTS_CONTEXT_KEY", "NOTES_PARENT_CONTEXT_KEY",
+    "BoardNotesSerializer", "GroupNotesSerializer",
+    "NotesPageQueryParamsSerializer", "NotesChangesQueryParamsSerializer",
+    "NotesMoveSerializer",
+    "NoteTombstoneSerializer"
 ]
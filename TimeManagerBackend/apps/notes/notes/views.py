@@ -1,14 +1,234 @@
-from django.http import Http404
+import json
+from typing import Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.timezone import now
+from google.api_core.exceptions import Conflict
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
-from TimeManagerBackend.lib.commons.firestore import get_firestore
+from TimeManagerBackend.lib.commons.firestore import (
+    chunked, not_found_as_404
+)
 from TimeManagerBackend.lib.commons.mixins import SerializerContextMixin
+from TimeManagerBackend.lib.errors.exc import ConflictException
 from . import serializers
 from ..boards.models import NotesBoard
 from ..groups.models import NotesGroup
+from ..search.models import NoteSearchEntry
+
+
+def unindex_deleted_note(container, pk: str) -> None:
+    """ Database side of a note deletion. """
+    container.adjust_note_count(-1)
+    NoteSearchEntry.objects.unindex(container, [pk])
+
+
+class NotesPageMixin:
+    # Amount of notes that share one editor lookup while streaming
+    stream_chunk_size = 100
+
+    def get_projection(self):
+        """ The only fields of the notes that the serializer renders. """
+        return self.get_serializer_class().Meta.projection  # noqa mixin
+
+    def get_page_response(self, container, **serializer_kwargs):
+        """ Respond with a single page of the notes of a board or group. """
+        query_serializer = serializers.NotesPageQueryParamsSerializer(
+            data=self.request.query_params  # noqa mixin
+        )
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        if params.pop("stream"):
+            return self.get_stream_response(
+                container, params.get("cursor"), **serializer_kwargs
+            )
+
+        try:
+            page = container.notes_page(
+                **params, fields=self.get_projection()
+            )
+        except ValueError:
+            raise ValidationError("Invalid cursor.")
+
+        serializer = self.get_serializer(  # noqa mixin
+            page.documents, many=True, **serializer_kwargs
+        )
+        next_ = None
+        if page.next_cursor:
+            next_ = {"href": replace_query_param(
+                self.request.build_absolute_uri(),  # noqa mixin
+                "cursor", page.next_cursor
+            )}
+
+        return Response(
+            {"next": next_, "results": serializer.data},
+            status=status.HTTP_200_OK
+        )
+
+    def get_stream_response(self, container, cursor,
+                            **serializer_kwargs) -> StreamingHttpResponse:
+        """
+        Respond with every note after 'cursor', in the same envelope
+        as a page. Notes are read, serialized and encoded incrementally,
+        so memory stays flat regardless of the size of the collection.
+        """
+        try:
+            notes = container.iter_notes(cursor, fields=self.get_projection())
+        except ValueError:
+            raise ValidationError("Invalid cursor.")
+
+        serializer = self.get_serializer(  # noqa mixin
+            [], many=True, **serializer_kwargs
+        )
+
+        def content() -> Iterator[bytes]:
+            yield b'{"next":null,"results":['
+            separator = b""
+            for chunk in chunked(notes, self.stream_chunk_size):
+                serializer.child.resolve_editors(chunk)
+                for note in chunk:
+                    yield separator + json.dumps(
+                        serializer.child.to_representation(note),
+                        cls=JSONEncoder
+                    ).encode()
+                    separator = b","
+            yield b"]}"
+
+        return StreamingHttpResponse(
+            content(),
+            status=status.HTTP_200_OK,
+            content_type="application/json"
+        )
+
+
+class NotesChangesMixin:
+    def get_changes_response(self, container, **serializer_kwargs) -> Response:
+        """
+        Respond with the notes that were edited and the tombstones
+        of notes that were deleted after the 'since' timestamp.
+        Clients should pass the returned 'until' as the next 'since'.
+        """
+        query_serializer = serializers.NotesChangesQueryParamsSerializer(
+            data=self.request.query_params  # noqa mixin
+        )
+        query_serializer.is_valid(raise_exception=True)
+
+        # Writes stamp their notes before they are committed,
+        # so a write that is still in flight may carry an earlier time
+        until = now() - settings.NOTES_CHANGES_MARGIN
+        notes, deleted = container.changes_since(
+            query_serializer.validated_data.get("since"),
+            fields=self.get_serializer_class().Meta.projection  # noqa mixin
+        )
+
+        serializer = self.get_serializer(  # noqa mixin
+            notes, many=True, **serializer_kwargs
+        )
+        tombstones = serializers.NoteTombstoneSerializer(deleted, many=True)
+        return Response({
+            "until": DateTimeField().to_representation(until),
+            "notes": serializer.data,
+            "deleted": tombstones.data
+        }, status=status.HTTP_200_OK)
+
+
+class NotesBatchMixin:
+    def get_batch_response(self, container, **serializer_kwargs) -> Response:
+        """
+        Upsert all notes of the request body in bulk,
+        responding with every note and whether it was created.
+        """
+        notes = self.request.data  # noqa mixin
+        if isinstance(notes, list) and (
+                len(notes) > settings.NOTES_MAX_BATCH_SIZE
+        ):
+            raise ValidationError(
+                f"At most {settings.NOTES_MAX_BATCH_SIZE} notes "
+                f"may be written at once."
+            )
+
+        context = serializer_kwargs.pop(
+            "context", self.get_serializer_context()  # noqa mixin
+        )
+        context[serializers.NOTES_PARENT_CONTEXT_KEY] = container
+        serializer = self.get_serializer(  # noqa mixin
+            data=notes, many=True, context=context, **serializer_kwargs
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response({"results": [
+            {"created": instance.id in serializer.created_ids, "note": note}
+            for instance, note in zip(serializer.instance, serializer.data)
+        ]}, status=status.HTTP_200_OK)
+
+
+class NotesMoveMixin:
+    def get_move_response(self, source, board: NotesBoard) -> Response:
+        """
+        Move notes from 'source' to the board or one of its groups,
+        responding with the moved notes as part of their new parent.
+        Membership of the board covers both source and target.
+        """
+        move = serializers.NotesMoveSerializer(
+            data=self.request.data  # noqa mixin
+        )
+        move.is_valid(raise_exception=True)
+
+        group_pk = move.validated_data.get("group")
+        if group_pk is None:
+            target = board
+        else:
+            target = get_object_or_404(
+                NotesGroup, id=group_pk, parent_id=board.pk
+            )
+        if target == source:
+            raise ValidationError("The notes already belong to the target.")
+
+        pks = list(dict.fromkeys(
+            str(pk) for pk in move.validated_data.get("notes")
+        ))
+        with not_found_as_404():
+            try:
+                moved = source.move_notes(pks, target)
+            except Conflict:
+                raise ConflictException(
+                    "Notes with the same id already exist in the target."
+                )
+
+        context = self.get_serializer_context()  # noqa mixin
+        if target is board:
+            serializer_class = serializers.BoardNotesSerializer
+        else:
+            serializer_class = serializers.GroupNotesSerializer
+            context[serializers.GROUP_PARENTS_CONTEXT_KEY] = {
+                str(target.pk): board.pk
+            }
+        serializer = serializer_class(moved, many=True, context=context)
+        return Response(
+            {"results": serializer.data}, status=status.HTTP_200_OK
+        )
+
+
+# /boards/:id/notes/
+class BoardNotesListView(NotesPageMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.BoardNotesSerializer
+
+    def get(self, request, boards_pk):
+        board = get_object_or_404(
+            NotesBoard.objects.filter(members__in=[request.user]),
+            id=boards_pk
+        )
+        return self.get_page_response(board)
 
 
 # /boards/:id/notes/:id/
@@ -36,17 +256,115 @@ class BoardNotesView(SerializerContextMixin, APIView):
             id=boards_pk
         )
 
-        db = get_firestore()
-        col_ref = db.collection("notes__boards", str(board.pk), "notes")
-        doc_ref = col_ref.document(pk)
+        # The tombstone lets clients that sync changes remove the note
+        with not_found_as_404():
+            board.notes_storage.delete(board, pk)
 
-        if not doc_ref.get().exists:
-            raise Http404
-
-        doc_ref.delete()
+        unindex_deleted_note(board, pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# /boards/:id/notes:batch/
+class BoardNotesBatchView(NotesBatchMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.BoardNotesSerializer
+
+    def post(self, request, boards_pk):
+        board = get_object_or_404(
+            NotesBoard.objects.filter(members__in=[request.user]),
+            id=boards_pk
+        )
+        return self.get_batch_response(board)
+
+
+# /boards/:id/notes:move/
+class BoardNotesMoveView(NotesMoveMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.BoardNotesSerializer
+
+    def post(self, request, boards_pk):
+        board = get_object_or_404(
+            NotesBoard.objects.filter(members__in=[request.user]),
+            id=boards_pk
+        )
+        return self.get_move_response(board, board)
+
+
+# /boards/:id/changes/
+class BoardNotesChangesView(NotesChangesMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.BoardNotesSerializer
+
+    def get(self, request, boards_pk):
+        board = get_object_or_404(
+            NotesBoard.objects.filter(members__in=[request.user]),
+            id=boards_pk
+        )
+        return self.get_changes_response(board)
+
+
+# /boards/:id/groups/:id/notes/
+class GroupNotesListView(NotesPageMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.GroupNotesSerializer
+
+    def get(self, request, boards_pk, groups_pk):
+        group = get_object_or_404(
+            NotesGroup.objects.filter(parent__members__in=[request.user]),
+            id=groups_pk, parent_id=boards_pk
+        )
+
+        context = self.get_serializer_context()
+        context[serializers.GROUP_PARENTS_CONTEXT_KEY] = {
+            str(group.pk): group.parent_id
+        }
+        return self.get_page_response(group, context=context)
+
+
+# /boards/:id/groups/:id/notes:batch/
+class GroupNotesBatchView(NotesBatchMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.GroupNotesSerializer
+
+    def post(self, request, boards_pk, groups_pk):
+        group = get_object_or_404(
+            NotesGroup.objects.filter(parent__members__in=[request.user]),
+            id=groups_pk, parent_id=boards_pk
+        )
+
+        context = self.get_serializer_context()
+        context[serializers.GROUP_PARENTS_CONTEXT_KEY] = {
+            str(group.pk): group.parent_id
+        }
+        return self.get_batch_response(group, context=context)
+
+
+# /boards/:id/groups/:id/notes:move/
+class GroupNotesMoveView(NotesMoveMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.GroupNotesSerializer
+
+    def post(self, request, boards_pk, groups_pk):
+        group = get_object_or_404(
+            NotesGroup.objects.filter(
+                parent__members__in=[request.user]
+            ).select_related("parent"),
+            id=groups_pk, parent_id=boards_pk
+        )
+        return self.get_move_response(group, group.parent)
+
+
+# /boards/:id/groups/:id/changes/
+class GroupNotesChangesView(NotesChangesMixin, SerializerContextMixin, APIView):
+    serializer_class = serializers.GroupNotesSerializer
+
+    def get(self, request, boards_pk, groups_pk):
+        group = get_object_or_404(
+            NotesGroup.objects.filter(parent__members__in=[request.user]),
+            id=groups_pk, parent_id=boards_pk
+        )
+
+        context = self.get_serializer_context()
+        context[serializers.GROUP_PARENTS_CONTEXT_KEY] = {
+            str(group.pk): group.parent_id
+        }
+        return self.get_changes_response(group, context=context)
+
+
 # /boards/:id/groups/:id/notes/:id/
 class GroupNotesView(SerializerContextMixin, APIView):
     serializer_class = serializers.GroupNotesSerializer
@@ -57,8 +375,12 @@ class GroupNotesView(SerializerContextMixin, APIView):
             id=groups_pk, parent_id=boards_pk
         )
 
+        context = self.get_serializer_context()
+        context[serializers.GROUP_PARENTS_CONTEXT_KEY] = {
+            str(group.pk): group.parent_id
+        }
         data = {"parent": group.pk, "id": pk, **request.data}
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=data, context=context)
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
@@ -72,12 +394,9 @@ class GroupNotesView(SerializerContextMixin, APIView):
             id=groups_pk, parent_id=boards_pk
         )
 
-        db = get_firestore()
-        col_ref = db.collection("notes__groups", str(group.pk), "notes")
-        doc_ref = col_ref.document(pk)
-
-        if not doc_ref.get().exists:
-            raise Http404
+        # The tombstone lets clients that sync changes remove the note
+        with not_found_as_404():
+            group.notes_storage.delete(group, pk)
 
-        doc_ref.delete()
+        unindex_deleted_note(group, pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,113 @@
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField
+)
+from django.db import models, transaction
+from django.db.models import F
+
+from ..notes.codec import decode_content
+
+
+class NoteSearchEntryManager(models.Manager):
+    def index(self, container, notes: Iterable) -> None:
+        """
+        Insert or update the entries of notes,
+        that were just written to the collection of 'container'.
+        """
+        scope = container.notes_scope()
+        entries = {
+            note.id: self.model(
+                note_id=note.id,
+                content=decode_content(note.get("content")) or "",
+                last_edited=note.get("last_edited"),
+                **scope
+            ) for note in notes
+        }
+        if not entries:
+            return
+
+        with transaction.atomic():
+            # Note ids are only unique within their board or group
+            scoped = self.filter(**scope, note_id__in=entries)
+            existing = dict(scoped.values_list("note_id", "pk"))
+            for note_id, pk in existing.items():
+                entries[note_id].pk = pk
+
+            self.bulk_create(
+                [e for k, e in entries.items() if k not in existing],
+                ignore_conflicts=True
+            )
+            self.bulk_update(
+                [e for k, e in entries.items() if k in existing],
+                ["content", "last_edited"]
+            )
+            scoped.update(search_vector=SearchVector(
+                "content", config=settings.NOTES_SEARCH_CONFIG
+            ))
+
+    def unindex(self, container, note_ids: Iterable[str]) -> None:
+        """ Remove the entries of notes of 'container'. """
+        self.filter(
+            **container.notes_scope(), note_id__in=list(note_ids)
+        ).delete()
+
+    def search(self, user, text: str) -> models.QuerySet:
+        """ Notes of the boards of 'user' that match 'text', best first. """
+        query = SearchQuery(
+            text, config=settings.NOTES_SEARCH_CONFIG, search_type="websearch"
+        )
+        return self.filter(
+            board__members=user, search_vector=query
+        ).annotate(
+            rank=SearchRank(F("search_vector"), query)
+        ).order_by("-rank", "-last_edited")
+
+
+class NoteSearchEntry(models.Model):
+    """
+    Postgres mirror of the content of a note, that makes notes searchable.
+    Kept in sync by every path that writes or deletes notes.
+    """
+    # The UUID of the note, which is only unique within its board or group
+    note_id = models.CharField(max_length=36)
+    board = models.ForeignKey(
+        to="notes.NotesBoard",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    # Null for notes that belong to the board itself
+    group = models.ForeignKey(
+        to="notes.NotesGroup",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+"
+    )
+    content = models.TextField()
+    last_edited = models.DateTimeField()
+    search_vector = SearchVectorField(null=True)
+
+    objects = NoteSearchEntryManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="notes_search_vector_idx")
+        ]
+        # Null groups are never equal, so board notes need their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=["board", "note_id"],
+                condition=models.Q(group__isnull=True),
+                name="notes_search_board_note_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["group", "note_id"],
+                condition=models.Q(group__isnull=False),
+                name="notes_search_group_note_uniq"
+            )
+        ]
+
+
+__all__ = ["NoteSearchEntry"]
@@ -0,0 +1,38 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+
+class NoteSearchQueryParamsSerializer(serializers.Serializer):  # noqa abstract
+    q = serializers.CharField(min_length=1, max_length=200)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.NOTES_SEARCH_MAX_RESULTS,
+        default=20
+    )
+
+
+class NoteSearchResultSerializer(serializers.Serializer):  # noqa abstract
+    self = serializers.SerializerMethodField()
+    content = serializers.CharField(read_only=True)
+    last_edited = serializers.DateTimeField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    def get_self(self, obj) -> dict:
+        """ Link to the note, as part of its board or group. """
+        if obj.group_id is None:
+            view_name = "notes:boards-notes"
+            kwargs = {"boards_pk": obj.board_id, "pk": obj.note_id}
+        else:
+            view_name = "notes:groups-notes"
+            kwargs = {
+                "boards_pk": obj.board_id,
+                "groups_pk": obj.group_id,
+                "pk": obj.note_id
+            }
+        return {"href": reverse(
+            view_name, kwargs=kwargs, request=self.context.get("request")
+        )}
+
+
+__all__ = ["NoteSearchQueryParamsSerializer", "NoteSearchResultSerializer"]
@@ -0,0 +1,27 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import serializers
+from .models import NoteSearchEntry
+
+
+# /search/
+class NoteSearchView(APIView):
+    def get(self, request):
+        """ Search the notes of all boards that the user is a member of. """
+        query_serializer = serializers.NoteSearchQueryParamsSerializer(
+            data=request.query_params
+        )
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        entries = NoteSearchEntry.objects.search(
+            request.user, params.get("q")
+        )[:params.get("limit")]
+        serializer = serializers.NoteSearchResultSerializer(
+            entries, many=True, context={"request": request}
+        )
+        return Response(
+            {"results": serializer.data}, status=status.HTTP_200_OK
+        )
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import NotesStorage
+from .firestore import FirestoreNotesStorage
+from .postgres import PostgresNotesStorage
+
+# The storages that 'NOTES_STORAGE' may select
+NOTES_STORAGES = {
+    "firestore": FirestoreNotesStorage,
+    "postgres": PostgresNotesStorage
+}
+
+
+@lru_cache
+def _create_notes_storage(name: str) -> NotesStorage:
+    try:
+        return NOTES_STORAGES[name]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown notes storage '{name}', expected one of "
+            f"{', '.join(NOTES_STORAGES)}."
+        )
+
+
+def get_notes_storage(name: Optional[str] = None) -> NotesStorage:
+    """ The storage called 'name', or the configured one by default. """
+    return _create_notes_storage(name or settings.NOTES_STORAGE)
+
+
+__all__ = ["NOTES_STORAGES", "NotesStorage", "get_notes_storage"]
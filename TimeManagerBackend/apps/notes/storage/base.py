@@ -0,0 +1,134 @@
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from TimeManagerBackend.lib.commons.firestore import Page
+
+# A single note to upsert, as its id, the changes to apply
+# if it exists and the full data to create it with otherwise
+Upsert = Tuple[str, dict, dict]
+
+
+class NotesStorage:
+    """
+    Where the notes of boards and groups are kept.
+
+    Notes are returned as read-only documents, that expose their
+    fields as attributes and through 'to_dict', their 'id' and the
+    'parent_pk' of the board or group that they belong to.
+    Missing notes are reported by raising 'NotFound',
+    no matter which storage is used.
+
+    The note counters and search entries of the containers
+    are not part of the storage, callers have to keep them in sync.
+    """
+    # Whether large note contents should be compressed before they are
+    # written, see 'encode_content'. The stored content may be bytes then.
+    compress_content = False
+
+    # Reads
+
+    def get_notes(self,
+                  container,
+                  fields: Optional[Iterable[str]] = None) -> list:
+        """ All notes, newest first, with only 'fields' if given. """
+        return list(self.iter_notes(container, fields=fields))
+
+    def notes_page(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   limit: int = 100,
+                   fields: Optional[Iterable[str]] = None) -> Page:
+        """
+        Page through the notes, newest first.
+        Raises a ValueError for malformed cursors.
+        """
+        raise NotImplementedError
+
+    def iter_notes(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator:
+        """ Lazily read all notes in the same order as the pages. """
+        raise NotImplementedError
+
+    def iter_tombstones(self, container) -> Iterator:
+        """ Lazily read the tombstones of all deleted notes. """
+        raise NotImplementedError
+
+    def changes_since(self,
+                      container,
+                      since: datetime,
+                      fields: Optional[Iterable[str]] = None) -> Tuple[
+        list, list
+    ]:
+        """
+        Notes that were edited and tombstones of notes
+        that were deleted after 'since', oldest first.
+        """
+        raise NotImplementedError
+
+    def count(self, containers: Sequence) -> List[int]:
+        """ The actual amount of notes of every container. """
+        raise NotImplementedError
+
+    # Writes
+
+    def upsert(self, container, pk: str, changes: dict, data: dict) -> Tuple[
+        Any, bool
+    ]:
+        """ Write a single note, returning it and whether it was new. """
+        raise NotImplementedError
+
+    def upsert_many(self, container, upserts: List[Upsert]) -> List[
+        Tuple[Any, bool]
+    ]:
+        """ Write many notes at once, in the same order as 'upserts'. """
+        return [self.upsert(container, *upsert) for upsert in upserts]
+
+    def update(self, note, changes: dict):
+        """ Apply 'changes' to a note that was read before. """
+        raise NotImplementedError
+
+    def delete(self, container, pk: str) -> None:
+        """ Delete a note, leaving a tombstone for syncing clients. """
+        raise NotImplementedError
+
+    def move(self, container, pks: List[str], target) -> list:
+        """
+        Move notes to 'target' at once, leaving tombstones behind.
+        Moves nothing if any of the notes is missing, or raises
+        'Conflict' if 'target' has notes with the same ids.
+        """
+        raise NotImplementedError
+
+    def move_all(self, container, target) -> int:
+        """
+        Move every note to 'target' and drop the tombstones.
+        Moved notes replace the notes of 'target' that have the same id,
+        so this returns the amount of notes that 'target' gained.
+        """
+        raise NotImplementedError
+
+    def clear(self, containers: Iterable) -> None:
+        """ Delete all notes and tombstones of the containers. """
+        raise NotImplementedError
+
+    def prune_tombstones(self, containers: Iterable, before: datetime) -> int:
+        """
+        Delete the tombstones of notes that were deleted before 'before',
+        returning the amount of tombstones that were deleted.
+        """
+        raise NotImplementedError
+
+    # Copies between storages
+
+    def import_notes(self, container, notes: List) -> None:
+        """ Write notes of another storage as they are, e.g. to migrate. """
+        raise NotImplementedError
+
+    def import_tombstones(self, container, tombstones: List) -> None:
+        """ Write tombstones of another storage as they are. """
+        raise NotImplementedError
+
+
+__all__ = ["Upsert", "NotesStorage"]
@@ -0,0 +1,328 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.utils.timezone import now
+from google.api_core.exceptions import Conflict, NotFound
+from google.cloud import firestore
+
+from TimeManagerBackend.lib.commons.cache import (
+    cached_page, invalidate_collections
+)
+from TimeManagerBackend.lib.commons.firestore import (
+    MAX_BATCH_SIZE,
+    DocumentWrapper,
+    Page,
+    chunked,
+    count_documents,
+    delete_collections,
+    delete_documents,
+    fan_out,
+    get_firestore,
+    move_documents,
+    ordered_query,
+    paginate,
+    paginate_snapshots,
+    project,
+    wrap_document
+)
+from TimeManagerBackend.lib.commons.mirror import get_mirror_registry
+from .base import NotesStorage, Upsert
+
+
+class FirestoreNotesStorage(NotesStorage):
+    """
+    Notes as documents of the 'notes' collection of their container,
+    with tombstones in its 'deleted' collection.
+    Reads go through the cache and, if enabled, the in-process mirror.
+    """
+    # Storage and bandwidth are billed by the byte
+    compress_content = True
+
+    @staticmethod
+    def get_mirrored_notes(container):
+        """
+        All notes from the in-process mirror, if mirroring is enabled
+        and the mirror can serve them, otherwise None.
+        Mirrors are updated by their listeners in the background,
+        so a write may take a moment to become visible.
+        """
+        if not settings.NOTES_MIRROR:
+            return None
+        return get_mirror_registry().documents(container.notes_collection)
+
+    def get_notes(self,
+                  container,
+                  fields: Optional[Iterable[str]] = None) -> List[DocumentWrapper]:
+        if (snapshots := self.get_mirrored_notes(container)) is not None:
+            return paginate_snapshots(
+                snapshots,
+                "created",
+                direction=firestore.Query.DESCENDING,
+                limit=len(snapshots)
+            ).documents
+
+        return list(self.iter_notes(container, fields=fields))
+
+    def notes_page(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   limit: int = 100,
+                   fields: Optional[Iterable[str]] = None) -> Page:
+        collection = container.notes_collection
+        if fields is not None:
+            fields = tuple(sorted(fields))
+
+        if (snapshots := self.get_mirrored_notes(container)) is not None:
+            return paginate_snapshots(
+                snapshots,
+                "created",
+                direction=firestore.Query.DESCENDING,
+                cursor=cursor,
+                limit=limit
+            )
+
+        key = (cursor, limit, ",".join(fields) if fields else fields)
+        return cached_page(collection, key, lambda: paginate(
+            collection,
+            "created",
+            direction=firestore.Query.DESCENDING,
+            cursor=cursor,
+            limit=limit,
+            fields=fields
+        ))
+
+    def iter_notes(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator[DocumentWrapper]:
+        query = ordered_query(
+            container.notes_collection,
+            "created",
+            direction=firestore.Query.DESCENDING,
+            cursor=cursor,
+            fields=fields
+        )
+        return (DocumentWrapper(s) for s in query.stream())
+
+    def iter_tombstones(self, container) -> Iterator[DocumentWrapper]:
+        return (
+            DocumentWrapper(s) for s in container.deleted_collection.stream()
+        )
+
+    def changes_since(self,
+                      container,
+                      since: datetime,
+                      fields: Optional[Iterable[str]] = None) -> Tuple[
+        List[DocumentWrapper], List[DocumentWrapper]
+    ]:
+        if fields is not None:
+            fields = {*fields, "last_edited"}
+        notes, deleted = fan_out(lambda q: list(q.stream()), [
+            project(container.notes_collection, fields).where(
+                "last_edited", ">", since
+            ).order_by("last_edited"),
+            container.deleted_collection.where(
+                "deleted", ">", since
+            ).order_by("deleted")
+        ])
+        # Notes that were re-created after their deletion still exist
+        recreated = {n.id for n in notes}
+        return (
+            [DocumentWrapper(n) for n in notes],
+            [DocumentWrapper(d) for d in deleted if d.id not in recreated]
+        )
+
+    def count(self, containers: Sequence) -> List[int]:
+        return fan_out(
+            lambda c: count_documents(c.notes_collection), containers
+        )
+
+    def upsert(self, container, pk: str, changes: dict, data: dict) -> Tuple[
+        DocumentWrapper, bool
+    ]:
+        """
+        Upserts are mostly edits of existing notes, so try that first.
+        The preconditions of 'update' and 'create' tell us
+        whether the note is new.
+        """
+        doc_ref = container.notes_collection.document(pk)
+        written, created = changes, False
+        try:
+            result = doc_ref.update(changes)
+        except NotFound:
+            try:
+                result = doc_ref.create(data)
+                written, created = data, True
+            except Conflict:
+                # The note was created concurrently in the meantime
+                result = doc_ref.update(changes)
+
+        invalidate_collections(container.notes_collection)
+        # Everything the representation needs was just written,
+        # so there is no need to read the document back
+        note = wrap_document(doc_ref, written, update_time=result.update_time)
+        return note, created
+
+    def upsert_many(self, container, upserts: List[Upsert]) -> List[
+        Tuple[DocumentWrapper, bool]
+    ]:
+        """
+        Upsert all notes with a single read, that tells apart new
+        and existing notes, and one batched commit per chunk of notes.
+        """
+        db = get_firestore()
+        collection = container.notes_collection
+        references = [collection.document(pk) for pk, *_ in upserts]
+
+        # Only existence matters, the mask keeps the response small
+        existing = {
+            s.id for s in db.get_all(references, field_paths=["created"])
+            if s.exists
+        }
+
+        def commit(chunk):
+            batch = db.batch()
+            for pk, changes, data in chunk:
+                if pk in existing:
+                    batch.update(collection.document(pk), changes)
+                else:
+                    batch.create(collection.document(pk), data)
+            try:
+                results = batch.commit()
+            except (Conflict, NotFound):
+                # Notes were created or deleted concurrently,
+                # so this chunk has to be upserted note by note
+                return [self.upsert(container, *upsert) for upsert in chunk]
+
+            return [
+                (wrap_document(
+                    collection.document(pk),
+                    changes if pk in existing else data,
+                    update_time=result.update_time
+                ), pk not in existing)
+                for (pk, changes, data), result in zip(chunk, results)
+            ]
+
+        written = [
+            upsert
+            for chunk in fan_out(commit, chunked(upserts, MAX_BATCH_SIZE))
+            for upsert in chunk
+        ]
+        invalidate_collections(collection)
+        return written
+
+    def update(self, note: DocumentWrapper, changes: dict) -> DocumentWrapper:
+        result = note.reference.set(changes, merge=True)
+        invalidate_collections(note.reference.parent)
+
+        # Only the written fields are needed for the representation
+        return wrap_document(
+            note.reference, changes, update_time=result.update_time
+        )
+
+    def delete(self, container, pk: str) -> None:
+        # The precondition fails with 'NotFound' for missing notes
+        container.delete_note_batch(pk).commit()
+        invalidate_collections(container.notes_collection)
+
+    def move(self, container, pks: List[str], target) -> List[DocumentWrapper]:
+        """ Moves the notes within a single transaction. """
+        references = [container.notes_collection.document(pk) for pk in pks]
+        targets = [target.notes_collection.document(pk) for pk in pks]
+        edited = now()
+
+        @firestore.transactional
+        def move(transaction) -> List[DocumentWrapper]:
+            snapshots = list(transaction.get_all(references))
+            if not all(s.exists for s in snapshots):
+                raise NotFound("Not all notes exist.")
+            # Only existence matters, the mask keeps the response small.
+            # 'Transaction.get_all' takes no mask, the client's does.
+            if any(s.exists for s in get_firestore().get_all(
+                    targets, field_paths=["created"], transaction=transaction
+            )):
+                raise Conflict("Notes with the same id exist in the target.")
+
+            moved = []
+            for snapshot in snapshots:
+                doc_ref = target.notes_collection.document(snapshot.id)
+                data = {**snapshot.to_dict(), "last_edited": edited}
+                transaction.set(doc_ref, data)
+                transaction.delete(snapshot.reference)
+                transaction.set(
+                    container.deleted_collection.document(snapshot.id),
+                    {"deleted": edited}
+                )
+                moved.append(wrap_document(doc_ref, data))
+            return moved
+
+        moved = move(get_firestore().transaction())
+        invalidate_collections(
+            container.notes_collection, target.notes_collection
+        )
+        return moved
+
+    def move_all(self, container, target) -> int:
+        snapshots = list(container.notes_collection.stream())
+        # Notes of the target with the same id are overwritten,
+        # only existence matters, the mask keeps the response small
+        replaced = sum(s.exists for s in get_firestore().get_all(
+            [target.notes_collection.document(s.id) for s in snapshots],
+            field_paths=["created"]
+        )) if snapshots else 0
+
+        # Moved notes count as edited, so that clients
+        # which sync the changes of the target pick them up
+        moved = move_documents(
+            snapshots,
+            target.notes_collection,
+            changes={"last_edited": now()}
+        )
+        invalidate_collections(
+            container.notes_collection, target.notes_collection
+        )
+        delete_collections([container.deleted_collection])
+        return moved - replaced
+
+    def clear(self, containers: Iterable) -> None:
+        containers = list(containers)
+        collections = [c.notes_collection for c in containers]
+        delete_collections(
+            collections + [c.deleted_collection for c in containers]
+        )
+        invalidate_collections(*collections)
+
+    def prune_tombstones(self, containers: Iterable, before: datetime) -> int:
+        # Only the references are needed to delete the tombstones
+        queries = [
+            project(c.deleted_collection, []).where("deleted", "<", before)
+            for c in containers
+        ]
+        return delete_documents(
+            snapshot.reference
+            for snapshots in fan_out(lambda q: list(q.stream()), queries)
+            for snapshot in snapshots
+        )
+
+    @staticmethod
+    def _set_all(collection, documents: List) -> None:
+        db = get_firestore()
+
+        def commit(chunk) -> None:
+            batch = db.batch()
+            for document in chunk:
+                batch.set(collection.document(document.id), document.to_dict())
+            batch.commit()
+
+        fan_out(commit, chunked(documents, MAX_BATCH_SIZE))
+
+    def import_notes(self, container, notes: List) -> None:
+        self._set_all(container.notes_collection, notes)
+        invalidate_collections(container.notes_collection)
+
+    def import_tombstones(self, container, tombstones: List) -> None:
+        self._set_all(container.deleted_collection, tombstones)
+
+
+__all__ = ["FirestoreNotesStorage"]
@@ -0,0 +1,83 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class StoredNote(models.Model):
+    """
+    A note of the Postgres notes storage.
+    The fields that notes are ordered and filtered by are columns,
+    every other field is kept as they are in the JSONB 'data'.
+    """
+    # The UUID of the note, the same as for the Firestore document,
+    # which is only unique within its board or group
+    note_id = models.CharField(max_length=36)
+    board = models.ForeignKey(
+        to="notes.NotesBoard",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    # Null for notes that belong to the board itself
+    group = models.ForeignKey(
+        to="notes.NotesGroup",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+"
+    )
+    created = models.DateTimeField()
+    last_edited = models.DateTimeField()
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            # Used by the keyset pagination of the notes, newest first
+            models.Index(
+                fields=["board", "group", "-created", "-note_id"],
+                name="stored_notes_page_idx"
+            ),
+            # Used by the changes feed
+            models.Index(
+                fields=["board", "group", "last_edited"],
+                name="stored_notes_changes_idx"
+            )
+        ]
+        # Null groups are never equal, so board notes need their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=["board", "note_id"],
+                condition=models.Q(group__isnull=True),
+                name="stored_notes_board_note_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["group", "note_id"],
+                condition=models.Q(group__isnull=False),
+                name="stored_notes_group_note_uniq"
+            )
+        ]
+
+
+class StoredNoteTombstone(models.Model):
+    """ Marks a note of the Postgres notes storage as deleted. """
+    note_id = models.CharField(max_length=36)
+    board = models.ForeignKey(
+        to="notes.NotesBoard",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    group = models.ForeignKey(
+        to="notes.NotesGroup",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+"
+    )
+    deleted = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["board", "group", "deleted"],
+                name="stored_tombstones_idx"
+            )
+        ]
+
+
+__all__ = ["StoredNote", "StoredNoteTombstone"]
@@ -0,0 +1,369 @@
+from datetime import datetime
+from functools import reduce
+from operator import or_
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, QuerySet
+from django.utils.timezone import now
+from google.api_core.exceptions import Conflict, NotFound
+
+from TimeManagerBackend.lib.commons.cursors import decode_cursor, encode_cursor
+from TimeManagerBackend.lib.commons.firestore import DocumentFields, Page
+from .base import NotesStorage, Upsert
+from .models import StoredNote, StoredNoteTombstone
+from ..notes.codec import decode_content
+
+
+class NoteRecord(DocumentFields):
+    """ A note or tombstone of the Postgres storage, read like a document. """
+    __slots__ = ("id", "scope", "update_time")
+
+    def __init__(self, pk: str, scope: dict, data: dict,
+                 update_time: Optional[datetime] = None) -> None:
+        super().__init__(data)
+        self.id = pk
+        # The board and group of the note, as in 'notes_scope'
+        self.scope = scope
+        self.update_time = update_time
+
+    @property
+    def parent_pk(self) -> str:
+        return str(self.scope["group_id"] or self.scope["board_id"])
+
+    @property
+    def pk(self) -> str:
+        return self.id
+
+
+def split_note_data(data: dict) -> Tuple[datetime, datetime, dict]:
+    """ The creation and edit times of a note and its remaining fields. """
+    data = dict(data)
+    return data.pop("created", None), data.pop("last_edited", None), data
+
+
+def merge_note_changes(note: StoredNote, changes: dict) -> None:
+    _, last_edited, fields = split_note_data(changes)
+    note.data = {**note.data, **fields}
+    if last_edited is not None:
+        note.last_edited = last_edited
+
+
+def to_record(note: StoredNote,
+              fields: Optional[Iterable[str]] = None) -> NoteRecord:
+    data = {
+        **note.data, "created": note.created, "last_edited": note.last_edited
+    }
+    if fields is not None:
+        # Same as for Firestore, the order field is always included
+        fields = {*fields, "created"}
+        data = {k: v for k, v in data.items() if k in fields}
+    return NoteRecord(
+        note.note_id,
+        {"board_id": note.board_id, "group_id": note.group_id},
+        data,
+        update_time=note.last_edited
+    )
+
+
+def to_tombstone_record(tombstone: StoredNoteTombstone) -> NoteRecord:
+    return NoteRecord(
+        tombstone.note_id,
+        {"board_id": tombstone.board_id, "group_id": tombstone.group_id},
+        {"deleted": tombstone.deleted}
+    )
+
+
+class PostgresNotesStorage(NotesStorage):
+    """
+    Notes as JSONB rows next to their boards and groups,
+    so every read is a single indexed query of the same database.
+
+    Fields other than 'created' and 'last_edited' are stored as JSON,
+    so they have to be of types that JSON can represent.
+    Large values are compressed by Postgres itself (TOAST).
+    """
+
+    # Amount of rows that are fetched at once while iterating
+    chunk_size = 500
+
+    @staticmethod
+    def _notes(container) -> QuerySet:
+        return StoredNote.objects.filter(**container.notes_scope())
+
+    def _ordered_notes(self, container, cursor: Optional[str]) -> QuerySet:
+        queryset = self._notes(container).order_by("-created", "-note_id")
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2 or not (
+                    isinstance(values[0], datetime) and
+                    isinstance(values[1], str)
+            ):
+                raise ValueError("Malformed cursor.")
+            created, pk = values
+            queryset = queryset.filter(
+                Q(created__lt=created) | Q(created=created, note_id__lt=pk)
+            )
+        return queryset
+
+    def notes_page(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   limit: int = 100,
+                   fields: Optional[Iterable[str]] = None) -> Page:
+        # Fetch one additional note to know whether there is a next page
+        notes = list(self._ordered_notes(container, cursor)[:limit + 1])
+        next_cursor = None
+        if len(notes) > limit:
+            notes = notes[:limit]
+            next_cursor = encode_cursor(notes[-1].created, notes[-1].note_id)
+
+        return Page([to_record(n, fields) for n in notes], next_cursor)
+
+    def iter_notes(self,
+                   container,
+                   cursor: Optional[str] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator[NoteRecord]:
+        notes = self._ordered_notes(container, cursor).iterator(
+            chunk_size=self.chunk_size
+        )
+        return (to_record(n, fields) for n in notes)
+
+    def iter_tombstones(self, container) -> Iterator[NoteRecord]:
+        tombstones = StoredNoteTombstone.objects.filter(
+            **container.notes_scope()
+        ).iterator(chunk_size=self.chunk_size)
+        return (to_tombstone_record(t) for t in tombstones)
+
+    def changes_since(self,
+                      container,
+                      since: datetime,
+                      fields: Optional[Iterable[str]] = None) -> Tuple[
+        List[NoteRecord], List[NoteRecord]
+    ]:
+        if fields is not None:
+            fields = {*fields, "last_edited"}
+        notes = list(self._notes(container).filter(
+            last_edited__gt=since
+        ).order_by("last_edited"))
+        # Notes that were re-created after their deletion still exist
+        deleted = StoredNoteTombstone.objects.filter(
+            **container.notes_scope(), deleted__gt=since
+        ).exclude(
+            note_id__in=[n.note_id for n in notes]
+        ).order_by("deleted")
+        return (
+            [to_record(n, fields) for n in notes],
+            [to_tombstone_record(t) for t in deleted]
+        )
+
+    def count(self, containers: Sequence) -> List[int]:
+        """ Counts the notes of all containers with a single query. """
+        if not containers:
+            return []
+        scopes = [c.notes_scope() for c in containers]
+        counts = {
+            (row["board_id"], row["group_id"]): row["count"]
+            for row in StoredNote.objects.filter(
+                reduce(or_, (Q(**scope) for scope in scopes))
+            ).values("board_id", "group_id").annotate(count=Count("pk"))
+        }
+        return [
+            counts.get((scope["board_id"], scope["group_id"]), 0)
+            for scope in scopes
+        ]
+
+    def _lock(self, container, pk: str) -> Optional[StoredNote]:
+        return self._notes(container).select_for_update().filter(
+            note_id=pk
+        ).first()
+
+    def _upsert(self, container, pk: str, changes: dict, data: dict) -> Tuple[
+        NoteRecord, bool
+    ]:
+        with transaction.atomic():
+            note = self._lock(container, pk)
+            if note is None:
+                created, last_edited, fields = split_note_data(data)
+                note = StoredNote.objects.create(
+                    note_id=pk,
+                    created=created,
+                    last_edited=last_edited,
+                    data=fields,
+                    **container.notes_scope()
+                )
+                return to_record(note), True
+
+            merge_note_changes(note, changes)
+            note.save(update_fields=["data", "last_edited"])
+            return to_record(note), False
+
+    def upsert(self, container, pk: str, changes: dict, data: dict) -> Tuple[
+        NoteRecord, bool
+    ]:
+        try:
+            return self._upsert(container, pk, changes, data)
+        except IntegrityError:
+            # The note was created concurrently in the meantime,
+            # so it is locked and updated the second time around
+            return self._upsert(container, pk, changes, data)
+
+    def upsert_many(self, container, upserts: List[Upsert]) -> List[
+        Tuple[NoteRecord, bool]
+    ]:
+        """ Upserts all notes with one read and two bulk writes. """
+        try:
+            with transaction.atomic():
+                existing = {
+                    n.note_id: n for n in self._notes(container).filter(
+                        note_id__in=[pk for pk, *_ in upserts]
+                    ).select_for_update()
+                }
+                written = []
+                for pk, changes, data in upserts:
+                    if pk in existing:
+                        merge_note_changes(existing[pk], changes)
+                        written.append((existing[pk], False))
+                    else:
+                        created, last_edited, fields = split_note_data(data)
+                        written.append((StoredNote(
+                            note_id=pk,
+                            created=created,
+                            last_edited=last_edited,
+                            data=fields,
+                            **container.notes_scope()
+                        ), True))
+
+                StoredNote.objects.bulk_update(
+                    [n for n, created in written if not created],
+                    ["data", "last_edited"]
+                )
+                StoredNote.objects.bulk_create(
+                    [n for n, created in written if created]
+                )
+        except IntegrityError:
+            # Notes were created concurrently,
+            # so they have to be upserted note by note
+            return super().upsert_many(container, upserts)
+
+        return [(to_record(n), created) for n, created in written]
+
+    def update(self, note: NoteRecord, changes: dict) -> NoteRecord:
+        with transaction.atomic():
+            stored = StoredNote.objects.select_for_update().filter(
+                **note.scope, note_id=note.id
+            ).first()
+            if stored is None:
+                raise NotFound("Note does not exist.")
+            merge_note_changes(stored, changes)
+            stored.save(update_fields=["data", "last_edited"])
+        return to_record(stored)
+
+    @staticmethod
+    def _bury(scope: dict, tombstones: List[Tuple[str, datetime]]) -> None:
+        """ Replace the tombstones of the given notes. """
+        StoredNoteTombstone.objects.filter(
+            **scope, note_id__in=[pk for pk, _ in tombstones]
+        ).delete()
+        StoredNoteTombstone.objects.bulk_create([
+            StoredNoteTombstone(note_id=pk, deleted=deleted, **scope)
+            for pk, deleted in tombstones
+        ])
+
+    def delete(self, container, pk: str) -> None:
+        with transaction.atomic():
+            deleted, _ = self._notes(container).filter(note_id=pk).delete()
+            if not deleted:
+                raise NotFound("Note does not exist.")
+            self._bury(container.notes_scope(), [(pk, now())])
+
+    def move(self, container, pks: List[str], target) -> List[NoteRecord]:
+        """ Moves the notes within a single transaction. """
+        edited = now()
+        with transaction.atomic():
+            notes = {
+                n.note_id: n for n in self._notes(container).filter(
+                    note_id__in=pks
+                ).select_for_update()
+            }
+            if len(notes) != len(set(pks)):
+                raise NotFound("Not all notes exist.")
+            if self._notes(target).filter(note_id__in=pks).exists():
+                raise Conflict("Notes with the same id exist in the target.")
+
+            self._notes(container).filter(note_id__in=pks).update(
+                last_edited=edited, **target.notes_scope()
+            )
+            self._bury(container.notes_scope(), [(pk, edited) for pk in pks])
+
+        moved = []
+        for pk in pks:
+            note = notes[pk]
+            for field, value in target.notes_scope().items():
+                setattr(note, field, value)
+            note.last_edited = edited
+            moved.append(to_record(note))
+        return moved
+
+    def move_all(self, container, target) -> int:
+        with transaction.atomic():
+            # Same as for Firestore, moved notes replace
+            # the notes of the target that have the same id
+            replaced, _ = self._notes(target).filter(note_id__in=self._notes(
+                container
+            ).values("note_id")).delete()
+            # Moved notes count as edited, so that clients
+            # which sync the changes of the target pick them up
+            moved = self._notes(container).update(
+                last_edited=now(), **target.notes_scope()
+            )
+            StoredNoteTombstone.objects.filter(
+                **container.notes_scope()
+            ).delete()
+        return moved - replaced
+
+    def clear(self, containers: Iterable) -> None:
+        scopes = [Q(**c.notes_scope()) for c in containers]
+        if not scopes:
+            return
+        with transaction.atomic():
+            StoredNote.objects.filter(reduce(or_, scopes)).delete()
+            StoredNoteTombstone.objects.filter(reduce(or_, scopes)).delete()
+
+    def prune_tombstones(self, containers: Iterable, before: datetime) -> int:
+        scopes = [Q(**c.notes_scope()) for c in containers]
+        if not scopes:
+            return 0
+        deleted, _ = StoredNoteTombstone.objects.filter(
+            reduce(or_, scopes), deleted__lt=before
+        ).delete()
+        return deleted
+
+    def import_notes(self, container, notes: List) -> None:
+        rows = []
+        for note in notes:
+            created, last_edited, fields = split_note_data(note.to_dict())
+            # JSON has no bytes, other storages may have compressed them
+            if "content" in fields:
+                fields["content"] = decode_content(fields["content"])
+            rows.append(StoredNote(
+                note_id=note.id,
+                created=created,
+                last_edited=last_edited,
+                data=fields,
+                **container.notes_scope()
+            ))
+        with transaction.atomic():
+            self._notes(container).filter(
+                note_id__in=[r.note_id for r in rows]
+            ).delete()
+            StoredNote.objects.bulk_create(rows)
+
+    def import_tombstones(self, container, tombstones: List) -> None:
+        with transaction.atomic():
+            self._bury(container.notes_scope(), [
+                (t.id, t.deleted) for t in tombstones
+            ])
+
+
+__all__ = ["NoteRecord", "PostgresNotesStorage"]
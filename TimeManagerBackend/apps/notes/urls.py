@@ -5,7 +5,19 @@ from rest_framework_nested.routers import NestedSimpleRouter
 from .apps import CoreConfig as CurrentApp
 from .boards.views import NotesBoardViewSet, BoardMembersView
 from .groups.views import NotesGroupViewSet
-from .notes.views import BoardNotesView, GroupNotesView
+from .search.views import NoteSearchView
+from .notes.views import (
+    BoardNotesBatchView,
+    BoardNotesChangesView,
+    BoardNotesListView,
+    BoardNotesMoveView,
+    BoardNotesView,
+    GroupNotesBatchView,
+    GroupNotesChangesView,
+    GroupNotesListView,
+    GroupNotesMoveView,
+    GroupNotesView
+)
 
 app_name = CurrentApp.name
 
@@ -18,16 +30,61 @@ nested_router = NestedSimpleRouter(
 nested_router.register(r"groups", NotesGroupViewSet, basename="groups")
 
 urlpatterns = [
+    path(
+        "search/",
+        NoteSearchView.as_view(),
+        name="search"
+    ),
     path(
         "boards/<boards_pk>/members/",
         BoardMembersView.as_view(),
         name="boards-members"
     ),
+    path(
+        "boards/<boards_pk>/notes/",
+        BoardNotesListView.as_view(),
+        name="boards-notes-list"
+    ),
     path(
         "boards/<boards_pk>/notes/<pk>/",
         BoardNotesView.as_view(),
         name="boards-notes"
     ),
+    path(
+        "boards/<boards_pk>/notes:batch/",
+        BoardNotesBatchView.as_view(),
+        name="boards-notes-batch"
+    ),
+    path(
+        "boards/<boards_pk>/notes:move/",
+        BoardNotesMoveView.as_view(),
+        name="boards-notes-move"
+    ),
+    path(
+        "boards/<boards_pk>/changes/",
+        BoardNotesChangesView.as_view(),
+        name="boards-changes"
+    ),
+    path(
+        "boards/<boards_pk>/groups/<groups_pk>/notes:batch/",
+        GroupNotesBatchView.as_view(),
+        name="groups-notes-batch"
+    ),
+    path(
+        "boards/<boards_pk>/groups/<groups_pk>/notes:move/",
+        GroupNotesMoveView.as_view(),
+        name="groups-notes-move"
+    ),
+    path(
+        "boards/<boards_pk>/groups/<groups_pk>/changes/",
+        GroupNotesChangesView.as_view(),
+        name="groups-changes"
+    ),
+    path(
+        "boards/<boards_pk>/groups/<groups_pk>/notes/",
+        GroupNotesListView.as_view(),
+        name="groups-notes-list"
+    ),
     path(
         "boards/<boards_pk>/groups/<groups_pk>/notes/<pk>/",
         GroupNotesView.as_view(),
@@ -73,6 +73,7 @@ def __manage_flush_expired__(request: Request, *args, **kwargs) -> Response:
 )
 class UserViewSet(PatchUpdateModelViewSet):
     serializer_class = serializers.UserSerializer
+    pagination_ordering = ("date_joined", "id")
 
     def get_queryset(self):
         User = get_user_model()
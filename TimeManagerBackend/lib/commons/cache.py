@@ -0,0 +1,85 @@
+import time
+from typing import Callable, Hashable, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from google.cloud.firestore import CollectionReference
+
+from .firestore import Page, wrap_document
+from ..prometheus import FIRESTORE_CACHE_HITS, FIRESTORE_CACHE_MISSES
+
+
+def get_cache() -> BaseCache:
+    return caches[getattr(settings, "FIRESTORE_CACHE", "default")]
+
+
+def collection_path(collection: CollectionReference) -> str:
+    return "/".join(collection._path)  # noqa protected
+
+
+def _version_key(collection: CollectionReference) -> str:
+    return f"firestore:version:{collection_path(collection)}"
+
+
+def get_collection_version(collection: CollectionReference) -> int:
+    """
+    Current version of a collection, that every cached read includes.
+    A version that was evicted restarts from the clock,
+    so it can never match the entries of an earlier version.
+    """
+    return get_cache().get_or_set(
+        _version_key(collection), time.time_ns(), timeout=None
+    )
+
+
+def invalidate_collections(*collections: CollectionReference) -> None:
+    """
+    Bump the version of the given collections, which orphans
+    all of their cached reads. Must be called by every write path.
+    """
+    cache = get_cache()
+    for collection in collections:
+        key = _version_key(collection)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def cached_page(collection: CollectionReference,
+                key: Tuple[Hashable, ...],
+                fetch: Callable[[], Page]) -> Page:
+    """
+    Read a page of a collection through the cache.
+    'key' identifies the read within the collection, e.g. its cursor.
+    """
+    cache = get_cache()
+    cache_key = "firestore:page:{path}:{version}:{key}".format(
+        path=collection_path(collection),
+        version=get_collection_version(collection),
+        key=":".join(str(k) for k in key)
+    )
+
+    cached = cache.get(cache_key)
+    if cached is not None:
+        FIRESTORE_CACHE_HITS.inc()
+        documents, next_cursor = cached
+        return Page([
+            wrap_document(collection.document(pk), data)
+            for pk, data in documents
+        ], next_cursor)
+
+    FIRESTORE_CACHE_MISSES.inc()
+    page = fetch()
+    cache.set(cache_key, (
+        [(d.id, d.to_dict()) for d in page.documents], page.next_cursor
+    ))
+    return page
+
+
+__all__ = [
+    "get_cache",
+    "get_collection_version",
+    "invalidate_collections",
+    "cached_page"
+]
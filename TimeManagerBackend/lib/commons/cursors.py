@@ -0,0 +1,54 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from typing import Any, List
+
+# Tags the datetimes in the payload, as JSON has no type for them
+DATETIME_TAG = "$dt"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {DATETIME_TAG: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and DATETIME_TAG in value:
+        return datetime.fromisoformat(value[DATETIME_TAG])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the ordering values of the last returned item
+    as an opaque, URL-safe cursor string.
+    """
+    payload = json.dumps(
+        [_encode_value(v) for v in values], separators=(",", ":")
+    )
+    return urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor that was created by 'encode_cursor'.
+    Raises a ValueError if the cursor is malformed.
+    """
+    try:
+        payload = json.loads(urlsafe_b64decode(cursor.encode("ascii")))
+    except (BinasciiError, UnicodeError, json.JSONDecodeError):
+        raise ValueError("Malformed cursor.")
+
+    if not isinstance(payload, list):
+        raise ValueError("Malformed cursor.")
+
+    try:
+        return [_decode_value(v) for v in payload]
+    except (TypeError, ValueError):
+        # Tagged datetimes that are not ISO 8601 strings
+        raise ValueError("Malformed cursor.")
+
+
+__all__ = ["encode_cursor", "decode_cursor"]
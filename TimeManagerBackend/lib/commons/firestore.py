@@ -1,14 +1,34 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from functools import lru_cache
-
-from drizm_commons.utils.type import AttrDict
+from itertools import count, islice
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    Union
+)
 
 try:
     import grpc
     from django.conf import settings
+    from django.http import Http404
+    from google.api_core.exceptions import NotFound
     from firebase_admin import firestore, initialize_app
     from firebase_admin.credentials import Certificate
-    from google.cloud.firestore import Client
-    from google.cloud.firestore_v1 import _helpers, DocumentSnapshot  # noqa private
+    from google.cloud.firestore import Client, CollectionReference, Query
+    from google.cloud.firestore_v1.field_path import FieldPath
+    from google.cloud.firestore_v1 import (  # noqa private
+        _helpers, DocumentReference, DocumentSnapshot
+    )
     from google.cloud.firestore_v1.gapic.firestore_client import (
         FirestoreClient
     )
@@ -22,6 +42,261 @@ except ImportError:
         "'firebase-admin' packages."
     )
 
+from .cursors import encode_cursor, decode_cursor
+from ..prometheus import (
+    FIRESTORE_CHANNEL_CALLS,
+    FIRESTORE_FANOUT_WIDTH,
+    FIRESTORE_FANOUT_WAIT,
+    FIRESTORE_RPC_DOCUMENTS,
+    FIRESTORE_RPC_ERRORS,
+    FIRESTORE_RPC_LATENCY
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Firestore rejects any batched write with more than 500 operations
+MAX_BATCH_SIZE = 500
+
+
+# Applied to every channel, unless overridden by the 'OPTIONS' of a database
+DEFAULT_CHANNEL_OPTIONS = {
+    # Keep idle connections alive through proxies and load balancers
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.keepalive_permit_without_calls": 1,
+    # Firestore documents may be up to 1 MiB, batches and queries more
+    "grpc.max_send_message_length": -1,
+    "grpc.max_receive_message_length": -1,
+    # Channels with the same arguments share their connections otherwise
+    "grpc.use_local_subchannel_pool": 1,
+}
+
+CHANNEL_COMPRESSION = {
+    None: grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+class FirestoreChannelPool:
+    """
+    Spread the RPCs of a single Firestore client over several
+    gRPC channels, so parallel calls are not limited by the
+    concurrent streams of a single HTTP/2 connection.
+    A channel is picked round-robin for every RPC.
+    """
+
+    def __init__(self, apis: List[FirestoreClient]) -> None:
+        self.apis = apis
+        self._next = count()
+
+    def __getattr__(self, name: str):
+        # Advancing the counter is atomic, so this is safe across threads
+        index = next(self._next) % len(self.apis)
+        FIRESTORE_CHANNEL_CALLS.labels(channel=str(index)).inc()
+        return getattr(self.apis[index], name)
+
+
+# Collection label of RPCs that do not access any documents,
+# or documents of more than a single root collection
+NO_COLLECTION = "-"
+MIXED_COLLECTIONS = "mixed"
+
+
+def collection_root(name: str) -> str:
+    """
+    Root collection of a document or collection resource name,
+    e.g. 'notes__boards' for '.../documents/notes__boards/1/notes/x'.
+    """
+    _, _, path = name.partition("/documents/")
+    return path.split("/", 1)[0] or NO_COLLECTION
+
+
+def _collection_label(names: Iterable[str]) -> str:
+    roots = {collection_root(name) for name in names}
+    if len(roots) > 1:
+        return MIXED_COLLECTIONS
+    return roots.pop() if roots else NO_COLLECTION
+
+
+def _written_document(write) -> str:
+    operation = write.WhichOneof("operation")
+    if operation == "update":
+        return write.update.name
+    if operation == "delete":
+        return write.delete
+    return write.transform.document
+
+
+class InstrumentedFirestoreClient(FirestoreClient):
+    """
+    Firestore API client that records the latency, the errors and
+    the returned documents of its RPCs in Prometheus, labelled by
+    the operation and the root collection that it accessed.
+
+    Commits are told apart by their writes, a commit of a single
+    write is the 'set' or 'delete' of a document reference.
+    The latency of streaming reads lasts until their last response,
+    listed documents are timed per page.
+
+    Snapshot listeners are not recorded, they open their long-lived
+    streams on the transport directly, see the mirror metrics instead.
+    """
+
+    @staticmethod
+    def _observe(operation: str, collection: str, call: Callable[[], R]) -> R:
+        labels = {"operation": operation, "collection": collection}
+        started = time.perf_counter()
+        try:
+            return call()
+        except Exception as e:
+            FIRESTORE_RPC_ERRORS.labels(
+                error=type(e).__name__, **labels
+            ).inc()
+            raise
+        finally:
+            FIRESTORE_RPC_LATENCY.labels(**labels).observe(
+                time.perf_counter() - started
+            )
+
+    @staticmethod
+    def _observe_stream(operation: str,
+                        collection: str,
+                        call: Callable[[], Iterable],
+                        is_document: Callable[[Any], bool]) -> Iterator:
+        labels = {"operation": operation, "collection": collection}
+        started = time.perf_counter()
+        documents = 0
+        try:
+            for response in call():
+                documents += is_document(response)
+                yield response
+        except Exception as e:
+            FIRESTORE_RPC_ERRORS.labels(
+                error=type(e).__name__, **labels
+            ).inc()
+            raise
+        finally:
+            # Also reached if the caller stops reading early
+            FIRESTORE_RPC_LATENCY.labels(**labels).observe(
+                time.perf_counter() - started
+            )
+            FIRESTORE_RPC_DOCUMENTS.labels(**labels).inc(documents)
+
+    def commit(self, database, writes=None, transaction=None, **kwargs):
+        writes = writes or []
+        if transaction:
+            operation = "transaction_commit"
+        elif len(writes) == 1:
+            operation = (
+                "delete"
+                if writes[0].WhichOneof("operation") == "delete"
+                else "set"
+            )
+        else:
+            operation = "batch_commit"
+
+        return self._observe(
+            operation,
+            _collection_label(_written_document(w) for w in writes),
+            lambda: super(InstrumentedFirestoreClient, self).commit(
+                database, writes, transaction, **kwargs
+            )
+        )
+
+    def batch_get_documents(self, database, documents, *args, **kwargs):
+        documents = list(documents)
+        return self._observe_stream(
+            "get",
+            _collection_label(documents),
+            lambda: super(InstrumentedFirestoreClient, self).batch_get_documents(
+                database, documents, *args, **kwargs
+            ),
+            lambda response: response.WhichOneof("result") == "found"
+        )
+
+    def run_query(self, parent, structured_query=None, *args, **kwargs):
+        collection = collection_root(parent)
+        if collection == NO_COLLECTION and structured_query is not None:
+            # Queries of root collections name them in their selector
+            selectors = getattr(structured_query, "from")
+            if selectors:
+                collection = selectors[0].collection_id
+
+        return self._observe_stream(
+            "stream",
+            collection,
+            lambda: super(InstrumentedFirestoreClient, self).run_query(
+                parent, structured_query, *args, **kwargs
+            ),
+            lambda response: response.HasField("document")
+        )
+
+    def list_documents(self, parent, collection_id, *args, **kwargs):
+        iterator = super().list_documents(
+            parent, collection_id, *args, **kwargs
+        )
+        labels = {
+            "operation": "list_documents",
+            "collection": collection_root(f"{parent}/{collection_id}")
+        }
+        fetch_page = iterator._method  # noqa protected
+
+        def observed_fetch_page(request):
+            # Pages are only fetched once the iterator is advanced
+            response = self._observe(
+                labels["operation"],
+                labels["collection"],
+                lambda: fetch_page(request)
+            )
+            FIRESTORE_RPC_DOCUMENTS.labels(**labels).inc(
+                len(response.documents)
+            )
+            return response
+
+        iterator._method = observed_fetch_page  # noqa protected
+        return iterator
+
+    def begin_transaction(self, *args, **kwargs):
+        return self._observe(
+            "begin_transaction",
+            NO_COLLECTION,
+            lambda: super(InstrumentedFirestoreClient, self).begin_transaction(
+                *args, **kwargs
+            )
+        )
+
+    def rollback(self, *args, **kwargs):
+        return self._observe(
+            "rollback",
+            NO_COLLECTION,
+            lambda: super(InstrumentedFirestoreClient, self).rollback(
+                *args, **kwargs
+            )
+        )
+
+
+def create_channels(db_settings: dict, credentials) -> List[grpc.Channel]:
+    options = {**DEFAULT_CHANNEL_OPTIONS, **db_settings.get("OPTIONS", {})}
+    kwargs = {
+        "options": list(options.items()),
+        "compression": CHANNEL_COMPRESSION[db_settings.get("COMPRESSION")]
+    }
+    amount = db_settings.get("CHANNELS", 1)
+
+    if "HOST" in db_settings:
+        target = f"{db_settings.get('HOST')}:{db_settings.get('PORT')}"
+        return [grpc.insecure_channel(target, **kwargs) for _ in range(amount)]
+
+    return [
+        FirestoreGrpcTransport.create_channel(
+            FirestoreClient.SERVICE_ADDRESS,
+            credentials=credentials,
+            **kwargs
+        ) for _ in range(amount)
+    ]
+
 
 @lru_cache
 def get_firestore() -> Client:
@@ -30,19 +305,20 @@ def get_firestore() -> Client:
     )
     db_settings = settings.FIRESTORE_DATABASES["default"]
 
-    # Production does not define extra settings
-    if not db_settings:
-        initialize_app(credentials)
-        return firestore.client()
-
-    channel = grpc.insecure_channel(
-        f"{db_settings.get('HOST')}:{db_settings.get('PORT')}"
-    )
-    transport = FirestoreGrpcTransport(channel=channel)
-
     initialize_app(credentials)
     client: Client = firestore.client()
-    client._firestore_api_internal = FirestoreClient(transport=transport)
+    client._firestore_api_internal = FirestoreChannelPool([
+        InstrumentedFirestoreClient(
+            transport=FirestoreGrpcTransport(channel=channel)
+        ) for channel in create_channels(
+            db_settings, client._credentials  # noqa protected
+        )
+    ])
+
+    # Production only defines the channel settings
+    if "HOST" not in db_settings:
+        return client
+
     client._rpc_metadata_internal = _helpers.metadata_with_prefix(
         client._database_string  # noqa protected
     )
@@ -55,38 +331,361 @@ def get_firestore() -> Client:
     return client
 
 
-def DocumentWrapper(snapshot: DocumentSnapshot) -> AttrDict:
+@lru_cache
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """ Bounded thread pool, shared by all fan-outs of the process. """
+    return ThreadPoolExecutor(
+        max_workers=getattr(settings, "FIRESTORE_FANOUT_WORKERS", 8),
+        thread_name_prefix="firestore-fanout"
+    )
+
+
+def fan_out(fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """
+    Call 'fn' for all items concurrently on the shared thread pool,
+    so independent Firestore calls only cost about a single round trip.
+    The results keep the order of the items.
+
+    'fn' must not fan out itself, as the nested calls would
+    compete with their callers for the same bounded pool.
+    """
+    items = list(items)
+    FIRESTORE_FANOUT_WIDTH.observe(len(items))
+    with FIRESTORE_FANOUT_WAIT.time():
+        if len(items) < 2:
+            return [fn(item) for item in items]
+        return list(get_fanout_executor().map(fn, items))
+
+
+def require_exists():
+    """
+    Write option that lets a write fail with 'NotFound',
+    if the document does not exist. Replaces a separate existence
+    check before the write, which costs an RPC and is racy.
+    """
+    return get_firestore().write_option(exists=True)
+
+
+@contextmanager
+def not_found_as_404():
+    """ Map failed 'require_exists' preconditions to a 404 response. """
+    try:
+        yield
+    except NotFound:
+        raise Http404
+
+
+class DocumentFields:
+    """
+    Read-only attribute access to the fields of a Firestore map.
+    Nested maps are only wrapped once they are accessed,
+    and the underlying dict is shared instead of being copied.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Optional[dict]) -> None:
+        self._data = data or {}
+
+    @staticmethod
+    def _wrap(value: Any) -> Any:
+        if isinstance(value, dict):
+            return DocumentFields(value)
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not slots or class attributes,
+        # unset private slots must not recurse into the fields
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._wrap(self._data[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._wrap(self._data[key])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._wrap(self._data.get(key, default))
+
+    def to_dict(self) -> dict:
+        """ Detached copy of the fields, that is safe to modify. """
+        return copy.deepcopy(self._data)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self._data!r}>"
+
+
+class DocumentWrapper(DocumentFields):
     """
     A wrapper around a Firestore DocumentSnapshot,
     to bring a Django-Model-esque API to a Snapshot
     and make it compatible with custom Serializer Fields.
     """
-    wrapper = AttrDict()
-    wrapper["_snapshot"] = snapshot
-    wrapper["reference"] = snapshot.reference
-    wrapper["id"] = snapshot.id
-    wrapper["pk"] = snapshot.id
+    __slots__ = ("_snapshot", "reference", "update_time")
 
-    snapshot_data = snapshot.to_dict()
-    if not snapshot_data:
+    def __init__(self, snapshot: DocumentSnapshot) -> None:
+        # Share the decoded fields of the snapshot, 'to_dict' deep-copies
+        super().__init__(snapshot._data)  # noqa protected
+        self._snapshot = snapshot
+        self.reference = snapshot.reference
+        self.update_time = snapshot.update_time
+
+    @classmethod
+    def from_data(cls,
+                  reference: DocumentReference,
+                  data: Optional[dict],
+                  update_time=None) -> "DocumentWrapper":
+        """
+        Wrap document data that is already known locally,
+        e.g. because it was just written, the same way as a snapshot.
+        """
+        wrapper = cls.__new__(cls)
+        DocumentFields.__init__(wrapper, data)
+        wrapper._snapshot = None
+        wrapper.reference = reference
+        wrapper.update_time = update_time
         return wrapper
 
-    def _wrap(data: dict, ad: AttrDict) -> AttrDict:
-        """ Recursively wrap objects (dicts) as AttrDicts. """
-        for k, v in data.items():
-            if isinstance(v, dict):
-                ad[k] = _wrap(v, AttrDict())
-            else:
-                ad[k] = v
-        return ad
+    @property
+    def id(self) -> str:
+        return self.reference.id
 
-    for key, value in snapshot_data.items():
-        if isinstance(value, dict):
-            wrapper[key] = _wrap(value, AttrDict())
-        else:
-            wrapper[key] = value
+    @property
+    def pk(self) -> str:
+        return self.reference.id
+
+    @property
+    def parent_pk(self) -> Optional[str]:
+        """ Id of the document that owns the collection of this one. """
+        parent = self.reference.parent.parent
+        return parent.id if parent is not None else None
+
+
+def wrap_document(reference: DocumentReference,
+                  data: Optional[dict],
+                  update_time=None) -> DocumentWrapper:
+    """ Shortcut for 'DocumentWrapper.from_data'. """
+    return DocumentWrapper.from_data(reference, data, update_time)
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """ Lazily split an iterable into lists of at most 'size' items. """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def count_documents(query: Query) -> int:
+    """
+    Count the documents matched by a query,
+    without downloading any of their fields.
+    """
+    keys_only = project(query, [])
+    return sum(1 for _ in keys_only.stream())
+
+
+class Page(NamedTuple):
+    documents: list
+    # Opaque cursor for the following page, None on the last page
+    next_cursor: Optional[str]
+
+
+def project(query: Union[CollectionReference, Query],
+            fields: Optional[Iterable[str]]) -> Union[CollectionReference, Query]:
+    """
+    Only fetch the given fields of every document, if any are given.
+    An empty projection still returns the ids of the documents.
+    """
+    if fields is None:
+        return query
+    return query.select(sorted(fields) or [FieldPath.document_id()])
+
+
+def ordered_query(collection: CollectionReference,
+                  order_field: str,
+                  direction: str = Query.ASCENDING,
+                  cursor: Optional[str] = None,
+                  fields: Optional[Iterable[str]] = None) -> Query:
+    """
+    Order a collection by 'order_field', with the document id
+    as a tie-breaker, and start after the position of 'cursor'.
+    With 'fields', only those and the order field are fetched.
+    Raises a ValueError for malformed cursors.
+    """
+    document_id = FieldPath.document_id()
+    if fields is not None:
+        # The order field is needed to create cursors
+        fields = {*fields, order_field}
+    query = project(collection, fields).order_by(
+        order_field, direction=direction
+    ).order_by(document_id, direction=direction)
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        if not isinstance(pk, str):
+            raise ValueError("Malformed cursor.")
+        query = query.start_after({order_field: value, document_id: pk})
+
+    return query
+
+
+def paginate(collection: CollectionReference,
+             order_field: str,
+             direction: str = Query.ASCENDING,
+             cursor: Optional[str] = None,
+             limit: int = 100,
+             fields: Optional[Iterable[str]] = None) -> Page:
+    """
+    Return one page of a collection, ordered by 'order_field'.
+
+    Pagination uses Firestore cursors ('start_after'),
+    so no skipped documents are ever read.
+    Raises a ValueError for malformed cursors.
+    """
+    query = ordered_query(collection, order_field, direction, cursor, fields)
+
+    # Fetch one additional document to know whether there is a next page
+    snapshots = list(query.limit(limit + 1).stream())
+    next_cursor = None
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        last = snapshots[-1]
+        next_cursor = encode_cursor(last.get(order_field), last.id)
+
+    return Page([DocumentWrapper(s) for s in snapshots], next_cursor)
+
+
+def paginate_snapshots(snapshots: List[DocumentSnapshot],
+                       order_field: str,
+                       direction: str = Query.ASCENDING,
+                       cursor: Optional[str] = None,
+                       limit: int = 100) -> Page:
+    """
+    Same as 'paginate', for documents that are already held in memory.
+    Pages and cursors are interchangeable with the ones of 'paginate'.
+    """
+    def sort_key(snapshot: DocumentSnapshot):
+        return snapshot.get(order_field), snapshot.id
+
+    descending = direction == Query.DESCENDING
+    snapshots = sorted(snapshots, key=sort_key, reverse=descending)
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # Compared with the timestamps of the snapshots, which are aware
+        if not (
+                isinstance(value, datetime) and
+                value.tzinfo is not None and
+                isinstance(pk, str)
+        ):
+            raise ValueError("Malformed cursor.")
+        position = (value, pk)
+        snapshots = [
+            s for s in snapshots
+            if (sort_key(s) < position if descending else sort_key(s) > position)
+        ]
+
+    next_cursor = None
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        last = snapshots[-1]
+        next_cursor = encode_cursor(last.get(order_field), last.id)
+
+    return Page([DocumentWrapper(s) for s in snapshots], next_cursor)
+
+
+def delete_collections(collections: Iterable[CollectionReference]) -> int:
+    """
+    Delete all documents of the given collections,
+    using chunked WriteBatch commits instead of one RPC per document.
+
+    The document references are listed without their fields,
+    so no document bodies are downloaded.
+    Returns the amount of documents that were deleted.
+    """
+    return delete_documents(
+        ref
+        for refs in fan_out(lambda c: list(c.list_documents()), collections)
+        for ref in refs
+    )
+
+
+def delete_documents(references: Iterable[DocumentReference]) -> int:
+    """
+    Delete the given documents, using chunked WriteBatch commits.
+    Returns the amount of documents that were deleted.
+    """
+    db = get_firestore()
+
+    def _commit(chunk: List[DocumentReference]) -> int:
+        batch = db.batch()
+        for ref in chunk:
+            batch.delete(ref)
+        batch.commit()
+        return len(chunk)
+
+    # The batches are independent of each other, so commit them at once
+    return sum(fan_out(_commit, chunked(references, MAX_BATCH_SIZE)))
+
+
+def move_documents(snapshots: Iterable[DocumentSnapshot],
+                   target: CollectionReference,
+                   changes: Optional[dict] = None) -> int:
+    """
+    Move documents into another collection, while keeping their ids,
+    using chunked WriteBatch commits.
+
+    The copy and the delete of a document are always part of the
+    same batch, so a failure can never leave a document duplicated
+    or lost, only the remaining documents unmoved.
+    'changes' are applied to every moved document.
+    Returns the amount of documents that were moved.
+    """
+    db = get_firestore()
+
+    moved = 0
+    # Every document needs two operations, one 'set' and one 'delete'
+    for chunk in chunked(snapshots, MAX_BATCH_SIZE // 2):
+        batch = db.batch()
+        for snapshot in chunk:
+            batch.set(
+                target.document(snapshot.id),
+                {**snapshot.to_dict(), **(changes or {})}
+            )
+            batch.delete(snapshot.reference)
+        batch.commit()
+        moved += len(chunk)
 
-    return wrapper
+    return moved
 
 
-__all__ = ["get_firestore", "DocumentWrapper"]
+__all__ = [
+    "MAX_BATCH_SIZE",
+    "DEFAULT_CHANNEL_OPTIONS",
+    "FirestoreChannelPool",
+    "collection_root",
+    "InstrumentedFirestoreClient",
+    "create_channels",
+    "get_firestore",
+    "require_exists",
+    "not_found_as_404",
+    "DocumentFields",
+    "DocumentWrapper",
+    "wrap_document",
+    "get_fanout_executor",
+    "fan_out",
+    "chunked",
+    "count_documents",
+    "Page",
+    "project",
+    "ordered_query",
+    "paginate",
+    "paginate_snapshots",
+    "delete_collections",
+    "delete_documents",
+    "move_documents"
+]
@@ -9,6 +9,7 @@ from django.urls import NoReverseMatch
 from drf_yasg import openapi
 from rest_framework import serializers
 from rest_framework.relations import Hyperlink
+from rest_framework.utils.urls import replace_query_param
 
 
 class HrefField(serializers.HyperlinkedIdentityField):
@@ -66,7 +67,11 @@ class HrefField(serializers.HyperlinkedIdentityField):
         if self.lookup_chain:
             for kwarg, lookup in self.lookup_chain.items():
                 if callable(lookup):
-                    kwargs[kwarg] = lookup(obj)
+                    # Same convention as DRF defaults and validators
+                    if getattr(lookup, "requires_context", False):
+                        kwargs[kwarg] = lookup(obj, self)
+                    else:
+                        kwargs[kwarg] = lookup(obj)
                 else:
                     kwargs[kwarg] = operator.attrgetter(lookup)(obj)
 
@@ -197,6 +202,9 @@ class DeferredCollectionField(HrefField):
         elif isinstance(q, str):
             q = attrgetter(q)(obj)
             return self.evaluate_queryset_length(obj, qset=q)
+        elif isinstance(q, int):
+            # Sources may also resolve to a precomputed count
+            length = q
         elif isinstance(q, Sequence):
             length = len(q)
         elif isinstance(q, Manager):
@@ -227,4 +235,36 @@ class DeferredCollectionField(HrefField):
         }]
 
 
-__all__ = ["HrefField", "SelfHrefField", "DeferredCollectionField"]
+class NextPageHrefField(HrefField):
+    """
+    Links to the next page of a paginated collection,
+    or is null if the object is showing the last page.
+    """
+
+    def __init__(
+        self,
+        cursor_source: str,
+        cursor_query_param: str = "cursor",
+        lookup_chain=None,
+        **kwargs,
+    ) -> None:
+        super(NextPageHrefField, self).__init__(lookup_chain, **kwargs)
+        self.cursor_source = cursor_source
+        self.cursor_query_param = cursor_query_param
+
+    def to_representation(self, value) -> Optional[Dict[str, str]]:
+        cursor = attrgetter(self.cursor_source)(value)
+        if cursor is None:
+            return None
+
+        href = super().to_representation(value)
+        href["href"] = replace_query_param(
+            href["href"], self.cursor_query_param, cursor
+        )
+        return href
+
+
+__all__ = [
+    "HrefField", "SelfHrefField", "DeferredCollectionField",
+    "NextPageHrefField"
+]
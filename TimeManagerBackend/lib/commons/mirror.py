@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from google.cloud.firestore import CollectionReference
+from google.cloud.firestore_v1 import DocumentSnapshot
+
+from .cache import collection_path
+from ..prometheus import (
+    FIRESTORE_MIRROR_COLLECTIONS,
+    FIRESTORE_MIRROR_DOCUMENTS,
+    FIRESTORE_MIRROR_EVICTIONS
+)
+
+
+class CollectionMirror:
+    """
+    In-memory copy of a single collection,
+    kept current by a Firestore snapshot listener.
+    """
+
+    def __init__(self, collection: CollectionReference) -> None:
+        self._documents: Dict[str, DocumentSnapshot] = {}
+        self._ready = threading.Event()
+        self.last_access = time.monotonic()
+        self.watch = collection.on_snapshot(self._on_snapshot)
+
+    # noinspection PyUnusedLocal
+    def _on_snapshot(self, snapshots, changes, read_time) -> None:
+        # Runs on the thread of the listener, replacing
+        # the whole mapping keeps concurrent reads consistent
+        self._documents = {s.id: s for s in snapshots}
+        self._ready.set()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def documents(self, timeout: float) -> Optional[List[DocumentSnapshot]]:
+        """
+        All documents of the collection, or None if the listener
+        did not receive its initial snapshot within 'timeout'.
+        """
+        self.last_access = time.monotonic()
+        if not self._ready.wait(timeout):
+            return None
+        return list(self._documents.values())
+
+    def close(self) -> None:
+        self.watch.unsubscribe()
+
+
+class MirrorRegistry:
+    """
+    LRU of collection mirrors of a worker process.
+
+    Mirrors are closed once they were not read for 'idle_seconds',
+    or when the least recently used ones have to make room
+    for the caps on mirrored collections and documents.
+    Collections that are larger than the document cap on their own
+    are not mirrored again for 'idle_seconds'.
+    """
+
+    def __init__(self,
+                 max_collections: int,
+                 max_documents: int,
+                 idle_seconds: float) -> None:
+        self.max_collections = max_collections
+        self.max_documents = max_documents
+        self.idle_seconds = idle_seconds
+        self._mirrors: "OrderedDict[str, CollectionMirror]" = OrderedDict()
+        # When collections were found to be too large, by their path
+        self._oversized: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def is_oversized(self, path: str) -> bool:
+        found = self._oversized.get(path)
+        if found is None:
+            return False
+        if found < time.monotonic() - self.idle_seconds:
+            # The collection may have shrunk in the meantime
+            del self._oversized[path]
+            return False
+        return True
+
+    def get(self, collection: CollectionReference) -> CollectionMirror:
+        path = collection_path(collection)
+        with self._lock:
+            mirror = self._mirrors.get(path)
+            if mirror is None:
+                mirror = CollectionMirror(collection)
+                self._mirrors[path] = mirror
+            mirror.last_access = time.monotonic()
+            self._mirrors.move_to_end(path)
+            self._evict()
+        return mirror
+
+    def _evict(self) -> None:
+        """ Close cold mirrors, then the least recently used ones. """
+        deadline = time.monotonic() - self.idle_seconds
+        for path in [
+            p for p, m in self._mirrors.items() if m.last_access < deadline
+        ]:
+            self._close(path)
+
+        for path in list(self._mirrors):
+            over_capacity = (
+                len(self._mirrors) > self.max_collections or
+                sum(map(len, self._mirrors.values())) > self.max_documents
+            )
+            if not over_capacity:
+                break
+            self._close(path)
+
+        FIRESTORE_MIRROR_COLLECTIONS.set(len(self._mirrors))
+        FIRESTORE_MIRROR_DOCUMENTS.set(sum(map(len, self._mirrors.values())))
+
+    def _close(self, path: str) -> None:
+        self._mirrors.pop(path).close()
+        FIRESTORE_MIRROR_EVICTIONS.inc()
+
+    def documents(self,
+                  collection: CollectionReference) -> Optional[List[DocumentSnapshot]]:
+        """
+        Read a collection from its mirror, subscribing to it if needed.
+        Returns None if the mirror can not serve the read,
+        so the caller has to query Firestore instead.
+        """
+        path = collection_path(collection)
+        with self._lock:
+            if self.is_oversized(path):
+                return None
+
+        mirror = self.get(collection)
+        snapshots = mirror.documents(settings.NOTES_MIRROR_READY_TIMEOUT)
+        with self._lock:
+            if self._mirrors.get(path) is not mirror:
+                # Evicted in the meantime
+                return None
+            if snapshots is None:
+                # The listener may have failed, so it is not kept around
+                self._close(path)
+                self._evict()
+                return None
+            if len(snapshots) > self.max_documents:
+                # Closed before it can push the other mirrors out
+                self._oversized[path] = time.monotonic()
+                self._close(path)
+                self._evict()
+                return None
+
+            # The initial snapshot may have pushed the mirrors over the cap
+            self._evict()
+            if path not in self._mirrors:
+                return None
+        return snapshots
+
+    def clear(self) -> None:
+        """ Close all mirrors and their listeners. """
+        with self._lock:
+            for path in list(self._mirrors):
+                self._close(path)
+            self._oversized.clear()
+            self._evict()
+
+
+@lru_cache
+def get_mirror_registry() -> MirrorRegistry:
+    return MirrorRegistry(
+        max_collections=settings.NOTES_MIRROR_MAX_COLLECTIONS,
+        max_documents=settings.NOTES_MIRROR_MAX_DOCUMENTS,
+        idle_seconds=settings.NOTES_MIRROR_IDLE_SECONDS
+    )
+
+
+__all__ = ["CollectionMirror", "MirrorRegistry", "get_mirror_registry"]
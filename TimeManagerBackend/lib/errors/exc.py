@@ -18,6 +18,12 @@ class NotFoundException(APIException):
     status_code = status.HTTP_404_NOT_FOUND
 
 
+class ConflictException(APIException):
+    default_code = "conflict"
+    default_detail = "Element conflicts with an existing one"
+    status_code = status.HTTP_409_CONFLICT
+
+
 class PasswordMismatchException(APIException):
     default_code = "password_mismatch"
     default_detail = "Provided password does not match actual"
@@ -31,6 +37,6 @@ class NotAuthenticatedException(APIException):
 
 
 __all__ = [
-    "ValidationError", "NotFoundException", "PasswordMismatchException",
-    "NotAuthenticatedException"
+    "ValidationError", "NotFoundException", "ConflictException",
+    "PasswordMismatchException", "NotAuthenticatedException"
 ]
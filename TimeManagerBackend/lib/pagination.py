@@ -0,0 +1,159 @@
+from typing import List, Optional, Sequence
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .commons.cursors import encode_cursor, decode_cursor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique, ascending key of model fields.
+
+    Pages are selected by comparing against the key of the last item
+    of the previous page, so the database never has to skip rows
+    through an OFFSET. The key defaults to ('created', 'id'),
+    views can override it through a 'pagination_ordering' attribute.
+    The key fields need a composite index to make this efficient.
+    """
+    ordering: Sequence[str] = ("created", "id")
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+
+    def __init__(self) -> None:
+        self.request = None
+        self.next_cursor: Optional[str] = None
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    @staticmethod
+    def get_keyset_filter(ordering: Sequence[str], values: Sequence) -> Q:
+        """
+        Expands the row comparison '(a, b) > (x, y)'
+        to 'a > x OR (a = x AND b > y)'.
+        """
+        keyset = Q()
+        for i, field in enumerate(ordering):
+            keyset |= Q(
+                **dict(zip(ordering[:i], values[:i])),
+                **{f"{field}__gt": values[i]}
+            )
+        return keyset
+
+    @staticmethod
+    def get_cursor_values(queryset: QuerySet,
+                          ordering: Sequence[str],
+                          cursor: str) -> List:
+        """
+        Decode a cursor into the values of the key fields, converted
+        to the types of those fields, so that tampered cursors
+        are rejected before they reach the database.
+        """
+        try:
+            values = decode_cursor(cursor)
+            if len(values) != len(ordering):
+                raise ValueError("Malformed cursor.")
+            return [
+                queryset.model._meta.get_field(field).to_python(value)  # noqa
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise ValidationError("Invalid cursor.")
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None):
+        self.request = request
+        ordering = getattr(view, "pagination_ordering", self.ordering)
+        queryset = queryset.order_by(*ordering)
+
+        if cursor := request.query_params.get(self.cursor_query_param):
+            values = self.get_cursor_values(queryset, ordering, cursor)
+            queryset = queryset.filter(self.get_keyset_filter(ordering, values))
+
+        # Fetch one additional item to know whether there is a next page
+        page_size = self.get_page_size(request)
+        items = list(queryset[:page_size + 1])
+
+        self.next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            self.next_cursor = encode_cursor(
+                *(getattr(last, field) for field in ordering)
+            )
+
+        return items
+
+    def get_next_link(self) -> Optional[dict]:
+        if not self.next_cursor:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return {
+            "href": replace_query_param(
+                url, self.cursor_query_param, self.next_cursor
+            )
+        }
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            "next": self.get_next_link(),
+            "results": data
+        })
+
+    def get_paginated_response_schema(self, schema) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "next": {
+                    "type": "object",
+                    "nullable": True,
+                    "properties": {
+                        "href": {"type": "string", "format": "uri"}
+                    }
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed to use `get_schema_fields()`'
+        assert coreschema is not None, 'coreschema must be installed to use `get_schema_fields()`'
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.String(
+                    title="Cursor",
+                    description="The pagination cursor value."
+                )
+            ),
+            coreapi.Field(
+                name=self.page_size_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Integer(
+                    title="Limit",
+                    description="Number of results to return per page."
+                )
+            )
+        ]
+
+
+__all__ = ["KeysetPagination"]
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django_prometheus.exports import ExportToDjangoView
+from prometheus_client import Counter, Gauge, Histogram
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.decorators import (
@@ -11,6 +12,61 @@ from rest_framework.decorators import (
 from rest_framework.permissions import BasePermission
 from rest_framework.request import Request
 
+FIRESTORE_FANOUT_WIDTH = Histogram(
+    "firestore_fanout_width",
+    "Amount of Firestore calls issued concurrently by a single fan-out.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, float("inf"))
+)
+FIRESTORE_FANOUT_WAIT = Histogram(
+    "firestore_fanout_wait_seconds",
+    "Total time spent waiting for all Firestore calls of a fan-out."
+)
+
+FIRESTORE_CHANNEL_CALLS = Counter(
+    "firestore_channel_calls",
+    "Firestore RPCs issued per channel of the channel pool.",
+    ["channel"]
+)
+
+# Labelled by the kind of RPC and the root collection that it accessed
+FIRESTORE_RPC_LATENCY = Histogram(
+    "firestore_rpc_latency_seconds",
+    "Time until the last response of a Firestore RPC was received.",
+    ["operation", "collection"]
+)
+FIRESTORE_RPC_ERRORS = Counter(
+    "firestore_rpc_errors",
+    "Firestore RPCs that failed, by the type of the error.",
+    ["operation", "collection", "error"]
+)
+FIRESTORE_RPC_DOCUMENTS = Counter(
+    "firestore_rpc_documents",
+    "Documents returned by Firestore reads.",
+    ["operation", "collection"]
+)
+
+FIRESTORE_CACHE_HITS = Counter(
+    "firestore_cache_hits",
+    "Firestore reads that were served from the cache."
+)
+FIRESTORE_CACHE_MISSES = Counter(
+    "firestore_cache_misses",
+    "Firestore reads that missed the cache and went to Firestore."
+)
+
+FIRESTORE_MIRROR_COLLECTIONS = Gauge(
+    "firestore_mirror_collections",
+    "Collections mirrored in memory by snapshot listeners."
+)
+FIRESTORE_MIRROR_DOCUMENTS = Gauge(
+    "firestore_mirror_documents",
+    "Documents held in memory by all collection mirrors."
+)
+FIRESTORE_MIRROR_EVICTIONS = Counter(
+    "firestore_mirror_evictions",
+    "Collection mirrors that were closed for being cold or over the cap."
+)
+
 
 class IsPrometheusAdmin(BasePermission):
     def has_permission(self, request, view) -> bool:
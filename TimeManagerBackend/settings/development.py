@@ -23,6 +23,17 @@ FIRESTORE_DATABASES = {
     'default': {
         'HOST': os.getenv('FIREBASE_DB_HOST', 'firebase'),
         'PORT': '8090',
+        'CHANNELS': 2,
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'firestore': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'firestore',
     }
 }
 
@@ -80,8 +80,61 @@ DATABASES = {
 }
 
 FIRESTORE_DATABASES = {
-    'default': {}
+    'default': {
+        # gRPC channels that the RPCs are spread over round-robin
+        'CHANNELS': 4,
+        # One of None, 'gzip' or 'deflate'
+        'COMPRESSION': None,
+        # Extra gRPC channel arguments, e.g. other keepalive settings
+        'OPTIONS': {},
+    }
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'firestore': {
+        # Writes only invalidate the cache that they go through, so it
+        # has to be shared by all instances and increment atomically,
+        # like memcached. Until there is one, Firestore reads are uncached.
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
 }
+FIRESTORE_CACHE = 'firestore'
+# Threads shared by all concurrent Firestore calls of a worker process
+FIRESTORE_FANOUT_WORKERS = 8
+# Changes that are still being written when they are synced,
+# are returned again by the next sync within this margin
+NOTES_CHANGES_MARGIN = timedelta(seconds=5)
+# Tombstones of deleted notes are pruned after this long, clients that
+# last synced before then have to fetch all notes again
+NOTES_TOMBSTONE_RETENTION = timedelta(days=30)
+# Mirror the notes of recently read boards and groups in memory,
+# kept current by snapshot listeners instead of queries
+NOTES_MIRROR = False
+NOTES_MIRROR_MAX_COLLECTIONS = 64
+NOTES_MIRROR_MAX_DOCUMENTS = 20000
+NOTES_MIRROR_IDLE_SECONDS = 300
+# Time to wait for the initial snapshot of a new mirror
+NOTES_MIRROR_READY_TIMEOUT = 2
+# Amount of notes that are returned per page, if not requested otherwise
+NOTES_PAGE_SIZE = 100
+NOTES_MAX_PAGE_SIZE = 500
+# Where notes are kept, either 'firestore' or 'postgres',
+# use the 'copy_notes' command to migrate between them
+NOTES_STORAGE = 'firestore'
+# Compress note contents of at least the threshold in bytes, with
+# 'zlib' or 'zstd' (needs the 'zstandard' package) before storing them.
+# Compressed contents are always read, so enable this only once every
+# worker runs a release that can decompress them.
+NOTES_CONTENT_CODEC = None
+NOTES_CONTENT_COMPRESSION_THRESHOLD = 4096
+# Text search configuration of the note search, 'simple' does not
+# stem words, as notes are written in more than one language
+NOTES_SEARCH_CONFIG = 'simple'
+NOTES_SEARCH_MAX_RESULTS = 100
+# Amount of notes that may be upserted by a single bulk request
+NOTES_MAX_BATCH_SIZE = 500
 
 if os.getenv("MIGRATION_MODE"):
     DATABASES["default"]["HOST"] = "localhost"
@@ -97,6 +150,9 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    'DEFAULT_PAGINATION_CLASS':
+        'TimeManagerBackend.lib.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
     'EXCEPTION_HANDLER':
         'TimeManagerBackend.lib.errors.handler.global_default_exception_handler'  # noqa
 }
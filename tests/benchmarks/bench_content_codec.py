@@ -0,0 +1,91 @@
+"""
+Compare the CPU time that the note content codecs spend
+with the bytes they save, for notes of several sizes.
+
+Run with:
+    poetry run python -m tests.benchmarks.bench_content_codec
+
+The 'break-even' column is the bandwidth below which compressing
+a note once and decompressing it once costs less time than
+transferring the bytes that it saves.
+"""
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TimeManagerBackend.settings")
+django.setup()
+
+from TimeManagerBackend.apps.notes.notes import codec  # noqa E402
+
+SIZES = (512, 4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024)
+ROUNDS = 50
+
+# Words of varying length, so the text compresses about like prose
+WORDS = [
+    "note", "meeting", "deadline", "project", "review", "the", "a", "and",
+    "backend", "release", "tomorrow", "customer", "feedback", "draft",
+    "- [ ]", "- [x]", "TODO:", "https://example.com/issue/", "of", "to",
+    "estimate", "sprint", "planning", "retrospective", "docs", "bug"
+]
+
+
+def make_content(size: int) -> str:
+    rng = random.Random(size)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        if word.endswith("/"):
+            word += str(rng.randint(1, 9999))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def measure(name: str, content: str) -> None:
+    raw = len(content.encode("utf-8"))
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        encoded = codec.encode_content(content, codec=name, threshold=0)
+    encode_time = (time.perf_counter() - started) / ROUNDS
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        codec.decode_content(encoded)
+    decode_time = (time.perf_counter() - started) / ROUNDS
+
+    stored = len(encoded) if isinstance(encoded, bytes) else raw
+    saved = raw - stored
+    cpu = encode_time + decode_time
+    break_even = saved / cpu / 1024 / 1024 if saved > 0 else 0
+
+    print(
+        f"{name:<6} {raw / 1024:>8.1f} KiB {stored / 1024:>8.1f} KiB "
+        f"{stored / raw:>6.0%} {encode_time * 1e6:>9.1f} us "
+        f"{decode_time * 1e6:>9.1f} us {break_even:>9.1f} MiB/s"
+    )
+
+
+def main() -> None:
+    codecs = ["zlib"]
+    if codec.zstandard is not None:
+        codecs.append("zstd")
+    else:
+        print("'zstandard' is not installed, skipping the zstd codec.\n")
+
+    print(
+        f"{'codec':<6} {'raw':>12} {'stored':>12} {'ratio':>6} "
+        f"{'encode':>12} {'decode':>12} {'break-even':>15}"
+    )
+    for size in SIZES:
+        content = make_content(size)
+        for name in codecs:
+            measure(name, content)
+
+
+if __name__ == "__main__":
+    main()
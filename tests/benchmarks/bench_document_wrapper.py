@@ -0,0 +1,93 @@
+"""
+Compare the time and allocations of wrapping Firestore snapshots
+with the previous AttrDict copies and the slotted DocumentWrapper.
+
+Run with:
+    poetry run python -m tests.benchmarks.bench_document_wrapper
+"""
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TimeManagerBackend.settings")
+django.setup()
+
+from drizm_commons.utils.type import AttrDict  # noqa E402
+from google.cloud.firestore_v1 import DocumentReference, DocumentSnapshot  # noqa E402
+
+from TimeManagerBackend.lib.commons.firestore import DocumentWrapper  # noqa E402
+
+DOCUMENTS = 10_000
+
+
+def legacy_wrapper(snapshot: DocumentSnapshot) -> AttrDict:
+    """ The wrapper as it was, an eager recursive AttrDict copy. """
+    wrapper = AttrDict()
+    wrapper["_snapshot"] = snapshot
+    wrapper["reference"] = snapshot.reference
+    wrapper["id"] = snapshot.reference.id
+    wrapper["pk"] = snapshot.reference.id
+
+    def _wrap(data: dict, ad: AttrDict) -> AttrDict:
+        for k, v in data.items():
+            ad[k] = _wrap(v, AttrDict()) if isinstance(v, dict) else v
+        return ad
+
+    return _wrap(snapshot.to_dict(), wrapper)
+
+
+def make_snapshots(count: int):
+    now = datetime.now(tz=timezone.utc)
+    return [
+        DocumentSnapshot(
+            reference=DocumentReference(
+                "notes__boards", "board", "notes", f"note-{i}", client=None
+            ),
+            data={
+                "created": now,
+                "creator": 1,
+                "last_edited": now,
+                "edited_by": 1,
+                "content": "Lorem ipsum dolor sit amet " * 8,
+                "meta": {"tags": ["a", "b"], "pinned": False}
+            },
+            exists=True,
+            read_time=now,
+            create_time=now,
+            update_time=now
+        ) for i in range(count)
+    ]
+
+
+def measure(name: str, wrap, snapshots) -> None:
+    def access(doc):
+        # The fields read by the notes serializers
+        return doc.id, doc.content, doc.edited_by, doc.last_edited
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    wrapped = [wrap(s) for s in snapshots]
+    for doc in wrapped:
+        access(doc)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<16} {elapsed * 1000:>9.1f} ms "
+        f"{peak / 1024:>10.1f} KiB peak "
+        f"per {len(snapshots)} documents"
+    )
+
+
+def main() -> None:
+    snapshots = make_snapshots(DOCUMENTS)
+    measure("AttrDict", legacy_wrapper, snapshots)
+    measure("DocumentWrapper", DocumentWrapper, snapshots)
+
+
+if __name__ == "__main__":
+    main()
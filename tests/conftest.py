@@ -1,16 +1,27 @@
 import base64
 import io
 import random
-from typing import Dict, Tuple, Optional
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Tuple, Optional, Iterator, List
+from unittest import mock
+from uuid import uuid4
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.utils.timezone import now
+from google.cloud.firestore import CollectionReference
+from google.cloud.firestore_v1.gapic.firestore_client import FirestoreClient
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from TimeManagerBackend.apps.images.models.serializers import UserProfilePictureSerializer
+from TimeManagerBackend.lib.commons.cache import invalidate_collections
+from TimeManagerBackend.lib.commons.firestore import (
+    MAX_BATCH_SIZE, get_firestore, chunked
+)
 
 # Default set of credentials for the test user
 TEST_USER_EMAIL = "default_tester@tester.de"
@@ -86,8 +97,61 @@ def random_hex_color() -> str:
     return "#%06x" % random.randint(0, 0xFFFFFF)
 
 
+def create_test_notes(col_ref: CollectionReference,
+                      user,
+                      count: int) -> List[str]:
+    """ Writes 'count' notes directly to a Firestore collection """
+    db = get_firestore()
+    ids = [str(uuid4()) for _ in range(count)]
+    for chunk in chunked(ids, MAX_BATCH_SIZE):
+        batch = db.batch()
+        for pk in chunk:
+            batch.set(col_ref.document(pk), {
+                "created": now(),
+                "creator": user.pk,
+                "last_edited": now(),
+                "edited_by": user.pk,
+                "content": f"Note {pk}"
+            })
+        batch.commit()
+
+    # Bypassing the write paths of the app, so bypass its cache too
+    invalidate_collections(col_ref)
+    return ids
+
+
+@contextmanager
+def count_firestore_rpcs() -> Iterator[Counter]:
+    """
+    Counts the calls to the Firestore API methods,
+    for as long as the context is active.
+    """
+    counts = Counter()
+    methods = (
+        "commit", "batch_get_documents", "run_query",
+        "list_documents", "begin_transaction", "rollback"
+    )
+
+    def _counted(name: str):
+        original = getattr(FirestoreClient, name)
+
+        def _wrapper(self, *args, **kwargs):
+            counts[name] += 1
+            return original(self, *args, **kwargs)
+
+        return _wrapper
+
+    with ExitStack() as stack:
+        for method in methods:
+            stack.enter_context(
+                mock.patch.object(FirestoreClient, method, _counted(method))
+            )
+        yield counts
+
+
 __all__ = [
     "TEST_USER_EMAIL", "TEST_USER_PASSWORD",
     "create_test_user", "obtain_tokens", "self_to_id",
-    "generate_test_image", "generate_image_b64", "random_hex_color"
+    "generate_test_image", "generate_image_b64", "random_hex_color",
+    "create_test_notes", "count_firestore_rpcs"
 ]
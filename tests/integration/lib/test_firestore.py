@@ -0,0 +1,98 @@
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from TimeManagerBackend.lib.commons.firestore import (
+    FirestoreChannelPool, collection_root, delete_collections, get_firestore
+)
+from TimeManagerBackend.lib.prometheus import FIRESTORE_CHANNEL_CALLS
+
+
+class TestFirestoreChannelPool(SimpleTestCase):
+    def test010_round_robin(self):
+        """
+        GIVEN the Firestore client uses a pool of channels
+        WHEN I issue several RPCs
+        THEN they should be spread evenly over all channels
+            AND every call should be counted for its channel
+        """
+        pool = get_firestore()._firestore_api  # noqa protected
+        self.assertIsInstance(pool, FirestoreChannelPool)
+
+        channels = [str(i) for i in range(len(pool.apis))]
+        before = [
+            FIRESTORE_CHANNEL_CALLS.labels(channel=c)._value.get()  # noqa
+            for c in channels
+        ]
+
+        doc_ref = get_firestore().collection("channel_pool").document("x")
+        for _ in range(len(channels) * 3):
+            doc_ref.get()
+
+        after = [
+            FIRESTORE_CHANNEL_CALLS.labels(channel=c)._value.get()  # noqa
+            for c in channels
+        ]
+        self.assertEqual([a - b for a, b in zip(after, before)], [3] * len(channels))
+
+
+class TestInstrumentedFirestoreClient(SimpleTestCase):
+    @staticmethod
+    def _sample(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test010_rpc_metrics(self):
+        """
+        GIVEN the Firestore client records metrics of its RPCs
+        WHEN I write, read and stream documents of a root collection
+        THEN every RPC should be timed by its operation and collection
+            AND the returned documents should be counted
+        """
+        collection = get_firestore().collection("rpc_metrics")
+        labels = {"collection": "rpc_metrics"}
+        operations = (
+            "set", "get", "stream", "list_documents", "batch_commit", "delete"
+        )
+        before = {
+            op: self._sample(
+                "firestore_rpc_latency_seconds_count", operation=op, **labels
+            ) for op in operations
+        }
+        streamed, listed = (self._sample(
+            "firestore_rpc_documents_total", operation=op, **labels
+        ) for op in ("stream", "list_documents"))
+
+        collection.document("a").set({"value": 1})
+        collection.document("a").get()
+        batch = get_firestore().batch()
+        batch.set(collection.document("b"), {"value": 2})
+        batch.set(collection.document("c"), {"value": 3})
+        batch.commit()
+        self.assertEqual(len(list(collection.stream())), 3)
+        self.assertEqual(len(list(collection.list_documents())), 3)
+        collection.document("a").delete()
+
+        for op in operations:
+            self.assertEqual(self._sample(
+                "firestore_rpc_latency_seconds_count", operation=op, **labels
+            ) - before[op], 1, op)
+        self.assertEqual(self._sample(
+            "firestore_rpc_documents_total", operation="stream", **labels
+        ) - streamed, 3)
+        self.assertEqual(self._sample(
+            "firestore_rpc_documents_total", operation="list_documents",
+            **labels
+        ) - listed, 3)
+        delete_collections([collection])
+
+    def test020_collection_root(self):
+        """
+        GIVEN the resource name of a nested document
+        WHEN its root collection is resolved
+        THEN it should be the first collection of its path
+        """
+        self.assertEqual(collection_root(
+            "projects/p/databases/(default)/documents/notes__boards/1/notes/x"
+        ), "notes__boards")
+        self.assertEqual(
+            collection_root("projects/p/databases/(default)/documents"), "-"
+        )
@@ -1,12 +1,21 @@
 from functools import partial
+from io import StringIO
 from typing import Optional
+from uuid import uuid4
 
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from TimeManagerBackend.apps.notes.boards.models import NotesBoard
-from ...conftest import create_test_user, self_to_id
+from TimeManagerBackend.apps.notes.groups.models import NotesGroup
+from TimeManagerBackend.lib.commons.cursors import encode_cursor
+from ...conftest import (
+    create_test_user, self_to_id, create_test_notes, count_firestore_rpcs
+)
 
 
 class TestNotesBoards(APITestCase):
@@ -116,7 +125,7 @@ class TestNotesBoards(APITestCase):
 
         # As we are the owner we should be able to see the board
         res = self.client.get(url)
-        content = res.json()
+        content = res.json().get("results")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(type(content), list)
         self.assertEqual(len(content), 1)
@@ -124,7 +133,7 @@ class TestNotesBoards(APITestCase):
         # Another user should not be able to see any boards
         self.client.force_authenticate(user=self.member)
         res = self.client.get(url)
-        content = res.json()
+        content = res.json().get("results")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(type(content), list)
         self.assertEqual(len(content), 0)
@@ -174,6 +183,132 @@ class TestNotesBoards(APITestCase):
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test060_delete_batched(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I own a board with notes in it and in its groups
+        WHEN I ask to delete that board
+        THEN all notes of the board and its groups should be deleted
+            AND the deletes should be sent in as few batches as possible
+        """
+        board = NotesBoard.objects.create(owner=self.user, title="Big")
+        board.members.set([self.user])
+        group = NotesGroup.objects.create(
+            parent=board, title="Group", color=0
+        )
+        create_test_notes(board.notes_collection, self.user, 520)
+        create_test_notes(group.notes_collection, self.user, 30)
+
+        self.client.force_authenticate(user=self.user)
+        url = reverse(self.detail, args=(board.pk,))
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        # 550 single deletes are sent as two batches of at most 500
+        self.assertEqual(rpcs["commit"], 2)
+        self.assertEqual(len(list(board.notes_collection.list_documents())), 0)
+        self.assertEqual(len(list(group.notes_collection.list_documents())), 0)
+
+    def test070_list_note_counts(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to list all boards
+        THEN every board should state the amount of notes it contains
+        """
+        board = NotesBoard.objects.create(owner=self.user, title="Counted")
+        board.members.set([self.user])
+
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            url = reverse("notes:boards-notes", args=(board.pk, uuid4()))
+            res = self.client.put(url, {"content": "Count me"})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(reverse(self.list))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        notes, = res.json().get("results")[0].get("notes")
+        self.assertEqual(notes.get("count"), 3)
+
+    def test080_recount_notes(self):
+        """
+        GIVEN a board whose stored note counter drifted
+        WHEN the note counters are recomputed
+        THEN the counter should match the notes in Firestore
+        """
+        board = NotesBoard.objects.create(owner=self.user, title="Drifted")
+        create_test_notes(board.notes_collection, self.user, 4)
+        board.refresh_from_db()
+        self.assertEqual(board.note_count, 0)
+
+        call_command("recount_notes", stdout=StringIO())
+        board.refresh_from_db()
+        self.assertEqual(board.note_count, 4)
+
+    def test090_retrieve_query_count(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to retrieve that board
+        THEN the amount of database queries should not grow with the notes
+        """
+        board = NotesBoard.objects.create(owner=self.user, title="Queries")
+        board.members.set([self.user, self.member])
+        url = reverse(self.detail, args=(board.pk,))
+        self.client.force_authenticate(user=self.user)
+
+        def _count_queries() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        create_test_notes(board.notes_collection, self.user, 2)
+        create_test_notes(board.notes_collection, self.member, 2)
+        few = _count_queries()
+
+        create_test_notes(board.notes_collection, self.user, 20)
+        create_test_notes(board.notes_collection, self.member, 20)
+        self.assertEqual(_count_queries(), few)
+
+    def test100_list_paginated(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of multiple boards
+        WHEN I ask to list all boards page by page
+        THEN I should get every board exactly once
+            AND every page but the last should link to the next one
+        """
+        self.client.force_authenticate(user=self.user)
+        request = self._get_create_board_partial(reverse(self.list))
+        ids = [self_to_id(request().json()) for _ in range(5)]
+
+        url = f"{reverse(self.list)}?limit=2"
+        seen, pages = [], 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            content = res.json()
+            seen += [self_to_id(b) for b in content.get("results")]
+            url = (content.get("next") or {}).get("href")
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, ids)
+
+        res = self.client.get(f"{reverse(self.list)}?cursor=nonsense")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Decodable, but of the wrong types
+        tampered = encode_cursor("yesterday", "not an id")
+        res = self.client.get(f"{reverse(self.list)}?cursor={tampered}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class TestBoardMembers(APITestCase):
     @classmethod
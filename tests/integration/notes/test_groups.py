@@ -2,14 +2,19 @@ from functools import partial
 from typing import Optional
 from uuid import uuid4
 
+from django.db import connection
 from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
 from parameterized.parameterized import parameterized
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from TimeManagerBackend.apps.notes.boards.models import NotesBoard
-from ...conftest import create_test_user, self_to_id
+from TimeManagerBackend.apps.notes.groups.models import NotesGroup
+from ...conftest import (
+    create_test_user, self_to_id, create_test_notes, count_firestore_rpcs
+)
 
 
 class TestGroups(APITestCase):
@@ -68,7 +73,7 @@ class TestGroups(APITestCase):
         self._test_group_create_request(url=url)()
 
         res = self.client.get(url)
-        content = res.json()
+        content = res.json().get("results")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(type(content), list)
         self.assertEqual(len(content), 1)
@@ -157,3 +162,81 @@ class TestGroups(APITestCase):
             self.assertEqual(len(notes), notes_count)
         else:
             self.assertGreater(len(notes), notes_count)
+
+    def test060_delete_moves_batched(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND a group of a board I am a member of contains notes
+        WHEN I ask to delete that group without cascading
+        THEN all of its notes should be moved to the board
+            AND the moves should be sent in as few batches as possible
+        """
+        group = NotesGroup.objects.create(
+            parent=self.board, title="Group", color=0
+        )
+        ids = create_test_notes(group.notes_collection, self.user, 300)
+
+        self.client.force_authenticate(user=self.user)
+        url = reverse(self.detail, args=(self.board.pk, group.pk))
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        # Each batch holds the 'set' and 'delete' of 250 notes
+        self.assertEqual(rpcs["commit"], 2)
+        self.assertEqual(len(list(group.notes_collection.list_documents())), 0)
+        moved = {ref.id for ref in self.board.notes_collection.list_documents()}
+        self.assertTrue(set(ids).issubset(moved))
+
+    def test065_delete_moves_colliding_ids(self):
+        """
+        GIVEN a group whose note has the same id as a note of its board
+        WHEN I ask to delete that group without cascading
+        THEN the moved note should replace the note of the board
+            AND the note counter of the board should only count it once
+        """
+        group = NotesGroup.objects.create(
+            parent=self.board, title="Group", color=0
+        )
+        ids = create_test_notes(group.notes_collection, self.user, 2)
+        self.board.notes_collection.document(ids[0]).set({"content": "Old"})
+        self.board.adjust_note_count(1)
+
+        self.client.force_authenticate(user=self.user)
+        url = reverse(self.detail, args=(self.board.pk, group.pk))
+        res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.board.refresh_from_db()
+        self.assertEqual(self.board.note_count, 2)
+        self.assertEqual(
+            sorted(r.id for r in self.board.notes_collection.list_documents()),
+            sorted(ids)
+        )
+
+    def test070_retrieve_query_count(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND a group of a board I am a member of contains notes
+        WHEN I ask to retrieve that group
+        THEN the amount of database queries should not grow with the notes
+        """
+        group = NotesGroup.objects.create(
+            parent=self.board, title="Group", color=0
+        )
+        url = reverse(self.detail, args=(self.board.pk, group.pk))
+        self.client.force_authenticate(user=self.user)
+
+        def _count_queries() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        create_test_notes(group.notes_collection, self.user, 2)
+        few = _count_queries()
+
+        create_test_notes(group.notes_collection, self.user, 20)
+        self.assertEqual(_count_queries(), few)
@@ -1,6 +1,14 @@
+import json
 import uuid
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
 from operator import attrgetter
 
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils.timezone import now
+from django.urls import resolve
 from parameterized.parameterized import parameterized_class
 from rest_framework import status
 from rest_framework.reverse import reverse
@@ -8,7 +16,16 @@ from rest_framework.test import APITestCase
 
 from TimeManagerBackend.apps.notes.boards.models import NotesBoard
 from TimeManagerBackend.apps.notes.groups.models import NotesGroup
-from ...conftest import create_test_user
+from TimeManagerBackend.apps.notes.notes.models import (
+    NOTE_REPRESENTATION_FIELDS
+)
+from TimeManagerBackend.apps.notes.storage import get_notes_storage
+from TimeManagerBackend.lib.commons.mirror import (
+    MirrorRegistry, get_mirror_registry
+)
+from ...conftest import (
+    create_test_user, create_test_notes, self_to_id, count_firestore_rpcs
+)
 
 
 @parameterized_class(
@@ -40,6 +57,11 @@ class TestNotes(APITestCase):
                 parent=self.board, **self.group
             )
 
+    def _get_list_url(self) -> str:
+        return reverse(
+            f"{self.base_url}-list", [arg(self) for arg in self.url_args]
+        )
+
     def _get_url(self) -> str:
         return reverse(
             self.base_url,
@@ -105,5 +127,589 @@ class TestNotes(APITestCase):
             "content": "midrtniutnhoiudrntzoindrotunodrnzi setnieu5rz"
         })
 
+        parent = self.group or self.board
+        parent.refresh_from_db()
+        self.assertEqual(parent.note_count, 1)
+
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        parent.refresh_from_db()
+        self.assertEqual(parent.note_count, 0)
+
+    def test030_paginate(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to list the notes page by page
+        THEN I should get every note exactly once
+            AND every page but the last should link to the next one
+        """
+        parent = self.group or self.board
+        ids = create_test_notes(parent.notes_collection, self.user, 5)
+
+        self.client.force_authenticate(user=self.user)
+        url = f"{self._get_list_url()}?limit=2"
+        seen, pages = [], 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            content = res.json()
+            seen += [self_to_id(n) for n in content.get("results")]
+            url = (content.get("next") or {}).get("href")
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(ids))
+
+        res = self.client.get(f"{self._get_list_url()}?cursor=nonsense")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Decodable, but the tagged datetime is not a string
+        tampered = urlsafe_b64encode(b'[{"$dt":5},"x"]').decode("ascii")
+        res = self.client.get(f"{self._get_list_url()}?cursor={tampered}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test040_detail_first_page(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to retrieve the board or group
+        THEN it should only contain the first page of notes
+            AND link to the next page
+        """
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 3)
+
+        if not self.group:
+            url = reverse("notes:boards-detail", args=(self.board.pk,))
+        else:
+            url = reverse(
+                "notes:groups-detail", args=(self.board.pk, self.group.pk)
+            )
+
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get(url)
+        content = res.json()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(content.get("notes")), 2)
+
+        res = self.client.get(content.get("notes_next").get("href"))
+        content = res.json()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(content.get("results")), 1)
+        self.assertIsNone(content.get("next"))
+
+    def test050_upsert_rpc_count(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+        WHEN I ask to upsert a note
+        THEN the note should never be read back from Firestore
+            AND an update of an existing note should take a single RPC
+        """
+        url = self._get_url()
+        self.client.force_authenticate(user=self.user)
+
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.put(url, {"content": "First version"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(rpcs["batch_get_documents"], 0)
+        # The update attempt fails and is followed by a create
+        self.assertEqual(rpcs["commit"], 2)
+
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.put(url, {"content": "Second version"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json().get("content"), "Second version")
+        self.assertEqual(sum(rpcs.values()), 1)
+
+    def test060_delete_rpc_count(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+        WHEN I ask to delete a note
+        THEN the delete should take a single RPC
+            AND deleting a missing note should fail with a 404
+        """
+        url = self._get_url()
+        self.client.force_authenticate(user=self.user)
+        self.client.put(url, {"content": "Short lived"})
+
+        for expected in (status.HTTP_204_NO_CONTENT, status.HTTP_404_NOT_FOUND):
+            with count_firestore_rpcs() as rpcs:
+                res = self.client.delete(url)
+            self.assertEqual(res.status_code, expected)
+            self.assertEqual(sum(rpcs.values()), 1)
+
+        parent = self.group or self.board
+        parent.refresh_from_db()
+        self.assertEqual(parent.note_count, 0)
+
+    def test070_stream(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to stream the notes
+        THEN I should get every note in a single streamed response
+        """
+        parent = self.group or self.board
+        ids = create_test_notes(parent.notes_collection, self.user, 150)
+
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get(f"{self._get_list_url()}?stream=true")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        content = json.loads(b"".join(res.streaming_content))
+        self.assertIsNone(content.get("next"))
+        self.assertEqual(
+            sorted(self_to_id(n) for n in content.get("results")),
+            sorted(ids)
+        )
+
+        res = self.client.get(f"{self._get_list_url()}?stream=true&cursor=x")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test090_cached_reads(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to list the notes repeatedly
+        THEN only the first read should query Firestore
+            AND a write should be visible to the next read
+        """
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 2)
+        self.client.force_authenticate(user=self.user)
+
+        with count_firestore_rpcs() as rpcs:
+            for _ in range(3):
+                res = self.client.get(self._get_list_url())
+                self.assertEqual(len(res.json().get("results")), 2)
+        self.assertEqual(rpcs["run_query"], 1)
+
+        self.client.put(self._get_url(), {"content": "Invalidates"})
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.get(self._get_list_url())
+        self.assertEqual(len(res.json().get("results")), 3)
+        self.assertEqual(rpcs["run_query"], 1)
+
+    @override_settings(NOTES_MIRROR=True)
+    def test100_mirrored_reads(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+            AND notes are mirrored in memory
+        WHEN I ask to list the notes page by page
+        THEN I should get every note exactly once
+            AND no page should query Firestore
+            AND malformed cursors should be rejected
+        """
+        self.addCleanup(get_mirror_registry().clear)
+        parent = self.group or self.board
+        ids = create_test_notes(parent.notes_collection, self.user, 5)
+
+        self.client.force_authenticate(user=self.user)
+        url = f"{self._get_list_url()}?limit=2"
+        seen = []
+        with count_firestore_rpcs() as rpcs:
+            while url:
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                content = res.json()
+                seen += [self_to_id(n) for n in content.get("results")]
+                url = (content.get("next") or {}).get("href")
+
+        self.assertEqual(sorted(seen), sorted(ids))
+        self.assertEqual(rpcs["run_query"], 0)
+
+        tampered = urlsafe_b64encode(b'[5,"x"]').decode("ascii")
+        res = self.client.get(f"{self._get_list_url()}?cursor={tampered}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test105_oversized_mirror(self):
+        """
+        GIVEN a collection that is larger than the mirror document cap
+        WHEN it is read through the mirror registry twice
+        THEN both reads should fall back to Firestore
+            AND the mirrors of other collections should be kept
+        """
+        registry = MirrorRegistry(
+            max_collections=4, max_documents=2, idle_seconds=60
+        )
+        self.addCleanup(registry.clear)
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 3)
+
+        self.assertEqual(registry.documents(parent.deleted_collection), [])
+        self.assertIsNone(registry.documents(parent.notes_collection))
+        self.assertIsNone(registry.documents(parent.notes_collection))
+        self.assertEqual(
+            list(registry._mirrors),  # noqa protected
+            ["/".join(parent.deleted_collection._path)]  # noqa protected
+        )
+
+    @override_settings(NOTES_CHANGES_MARGIN=timedelta(0))
+    def test110_changes(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask for the changes since a point in time
+        THEN I should only get the notes that were edited since
+            AND the ids of the notes that were deleted since
+        """
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 3)
+        since = now()
+
+        self.client.force_authenticate(user=self.user)
+        edited, deleted = self._get_url(), self._get_url()
+        self.client.put(edited, {"content": "Edited"})
+        self.client.put(deleted, {"content": "Deleted"})
+        self.client.delete(deleted)
+
+        if not self.group:
+            url = reverse("notes:boards-changes", args=(self.board.pk,))
+        else:
+            url = reverse(
+                "notes:groups-changes", args=(self.board.pk, self.group.pk)
+            )
+
+        res = self.client.get(url, {"since": since.isoformat()})
+        content = res.json()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [self_to_id(n) for n in content.get("notes")],
+            [edited.rstrip("/").split("/")[-1]]
+        )
+        self.assertEqual(
+            [d.get("id") for d in content.get("deleted")],
+            [deleted.rstrip("/").split("/")[-1]]
+        )
+
+        res = self.client.get(url, {"since": content.get("until")})
+        self.assertEqual(res.json().get("notes"), [])
+        self.assertEqual(res.json().get("deleted"), [])
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test120_batch(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+        WHEN I ask to upsert many notes at once
+        THEN every note should be created or updated
+            AND it should take a single read and a single commit
+        """
+        self.client.force_authenticate(user=self.user)
+        existing = str(uuid.uuid4())
+        self.client.put(
+            reverse(
+                self.base_url,
+                [arg(self) for arg in self.url_args] + [existing]
+            ),
+            {"content": "Before"}
+        )
+
+        url = reverse(
+            f"{self.base_url}-batch", [arg(self) for arg in self.url_args]
+        )
+        notes = [{"id": existing, "content": "After"}] + [
+            {"id": str(uuid.uuid4()), "content": f"New {i}"} for i in range(2)
+        ]
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.post(url, notes, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(rpcs["batch_get_documents"], 1)
+        self.assertEqual(rpcs["commit"], 1)
+
+        results = res.json().get("results")
+        self.assertEqual(
+            [r.get("created") for r in results], [False, True, True]
+        )
+        self.assertEqual(
+            [r.get("note").get("content") for r in results],
+            [n.get("content") for n in notes]
+        )
+
+        parent = self.group or self.board
+        parent.refresh_from_db()
+        self.assertEqual(parent.note_count, 3)
+
+        res = self.client.post(url, notes[:1] * 2, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test130_move(self):
+        """
+        GIVEN I have a user account
+            AND I am logged in
+            AND I am a member of a board that contains notes
+        WHEN I ask to move notes between the board and a group
+        THEN they should be moved within a single commit
+            AND moving notes that do not exist should move nothing
+            AND moving notes whose ids exist in the target should conflict
+        """
+        parent = self.group or self.board
+        ids = create_test_notes(parent.notes_collection, self.user, 3)
+        if self.group:
+            target, group_pk = self.board, None
+        else:
+            target = NotesGroup.objects.create(
+                parent=self.board, title="Target", color=0
+            )
+            group_pk = target.pk
+
+        url = reverse(
+            f"{self.base_url}-move", [arg(self) for arg in self.url_args]
+        )
+        self.client.force_authenticate(user=self.user)
+        with count_firestore_rpcs() as rpcs:
+            res = self.client.post(
+                url, {"notes": ids[:2], "group": group_pk}, format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(rpcs["commit"], 1)
+        self.assertEqual(
+            sorted(self_to_id(n) for n in res.json().get("results")),
+            sorted(ids[:2])
+        )
+
+        self.assertEqual(
+            sorted(d.id for d in target.notes_collection.list_documents()),
+            sorted(ids[:2])
+        )
+        self.assertEqual(
+            [d.id for d in parent.notes_collection.list_documents()],
+            ids[2:]
+        )
+        target.refresh_from_db()
+        self.assertEqual(target.note_count, 2)
+
+        res = self.client.post(
+            url, {"notes": ids, "group": group_pk}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(list(parent.notes_collection.list_documents())), 1)
+
+        target.notes_collection.document(ids[2]).set({"created": now()})
+        res = self.client.post(
+            url, {"notes": ids[2:], "group": group_pk}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(list(parent.notes_collection.list_documents())), 1)
+        target.refresh_from_db()
+        self.assertEqual(target.note_count, 2)
+
+    def test140_projection(self):
+        """
+        GIVEN a board or group that contains notes
+        WHEN its notes are read to be rendered
+        THEN only the rendered fields should be fetched
+        """
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 2)
+
+        for note in parent.notes_page(fields=NOTE_REPRESENTATION_FIELDS).documents:
+            self.assertNotIn("creator", note)
+            for field in NOTE_REPRESENTATION_FIELDS:
+                self.assertIn(field, note)
+
+        self.assertEqual(
+            [n.id for n in parent.get_notes(fields=[])],
+            [n.id for n in parent.notes]
+        )
+        self.assertNotIn("content", parent.get_notes(fields=[])[0])
+
+    def test150_search(self):
+        """
+        GIVEN a board or group that I am a member of
+        WHEN I search for words of one of its notes
+        THEN that note should be found, until it is deleted
+            AND notes of boards that I am not a member of should not be,
+            even if they have the same id
+        """
+        url = self._get_url()
+        search_url = reverse("notes:search")
+        pk = resolve(url).kwargs.get("pk")
+
+        other_board = NotesBoard.objects.create(
+            owner=self.member, title="Other Board"
+        )
+        other_board.members.set([self.member])
+        self.client.force_authenticate(user=self.member)
+        self.client.put(
+            reverse("notes:boards-notes", [other_board.pk, pk]),
+            {"content": "Grow zucchini"}
+        )
+
+        self.client.force_authenticate(user=self.user)
+        self.client.put(url, {"content": "Buy zucchini and paprika"})
+
+        res = self.client.get(search_url, {"q": "zucchini"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.json().get("results")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(
+            self_to_id(results[0]), resolve(url).kwargs.get("pk")
+        )
+
+        self.client.force_authenticate(user=self.member)
+        res = self.client.get(search_url, {"q": "paprika"})
+        self.assertEqual(res.json().get("results"), [])
+        res = self.client.get(search_url, {"q": "zucchini"})
+        self.assertEqual(len(res.json().get("results")), 1)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(url)
+        res = self.client.get(search_url, {"q": "zucchini"})
+        self.assertEqual(res.json().get("results"), [])
+
+    @override_settings(NOTES_STORAGE="postgres", NOTES_CHANGES_MARGIN=timedelta(0))
+    def test160_postgres_storage(self):
+        """
+        GIVEN notes are stored in Postgres instead of Firestore
+        WHEN I upsert, list, sync and delete notes
+        THEN the notes endpoints should behave the same
+        """
+        since = now()
+        url = self._get_url()
+        pk = resolve(url).kwargs.get("pk")
+
+        self.client.force_authenticate(user=self.user)
+        res = self.client.put(url, {"content": "Stored in Postgres"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self_to_id(res.json()), pk)
+        res = self.client.put(url, {"content": "Edited in Postgres"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # Note ids only have to be unique within their board or group
+        other_board = NotesBoard.objects.create(
+            owner=self.user, title="Other Board"
+        )
+        other_board.members.set([self.user])
+        res = self.client.put(
+            reverse("notes:boards-notes", [other_board.pk, pk]),
+            {"content": "Same id, other board"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(self._get_list_url())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [n.get("content") for n in res.json().get("results")],
+            ["Edited in Postgres"]
+        )
+
+        parent = self.group or self.board
+        parent.refresh_from_db()
+        self.assertEqual(parent.note_count, 1)
+        self.assertEqual(list(parent.notes_collection.list_documents()), [])
+
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        notes, deleted = parent.changes_since(since)
+        self.assertEqual(notes, [])
+        self.assertEqual([d.id for d in deleted], [pk])
+
+    def test170_copy_notes(self):
+        """
+        GIVEN a board or group with notes in Firestore
+        WHEN the notes are copied to the Postgres storage
+        THEN Postgres should return the same notes in the same order
+        """
+        parent = self.group or self.board
+        create_test_notes(parent.notes_collection, self.user, 7)
+
+        call_command(
+            "copy_notes", "firestore", "postgres",
+            "--batch-size", "3", stdout=StringIO()
+        )
+        firestore, postgres = (
+            get_notes_storage("firestore"), get_notes_storage("postgres")
+        )
+        self.assertEqual(
+            [(n.id, n.content) for n in postgres.get_notes(parent)],
+            [(n.id, n.content) for n in firestore.get_notes(parent)]
+        )
+        self.assertEqual(
+            postgres.notes_page(parent, limit=4).next_cursor,
+            firestore.notes_page(parent, limit=4).next_cursor
+        )
+
+    @override_settings(
+        NOTES_CONTENT_CODEC="zlib", NOTES_CONTENT_COMPRESSION_THRESHOLD=64
+    )
+    def test180_compressed_content(self):
+        """
+        GIVEN large note contents are compressed
+        WHEN I upsert a large and a small note
+        THEN only the large content should be stored compressed
+            AND both should be returned and found as they were written
+        """
+        large, small = "Compressible content " * 20, "Short content"
+        urls = [self._get_url(), self._get_url()]
+
+        self.client.force_authenticate(user=self.user)
+        for url, content in zip(urls, (large, small)):
+            res = self.client.put(url, {"content": content})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json().get("content"), content)
+
+        parent = self.group or self.board
+        stored = {
+            s.id: s.get("content") for s in parent.notes_collection.stream()
+        }
+        large_pk, small_pk = (resolve(url).kwargs.get("pk") for url in urls)
+        self.assertTrue(stored[large_pk].startswith(b"zlib:"))
+        self.assertEqual(stored[small_pk], small)
+
+        res = self.client.get(self._get_list_url())
+        self.assertEqual(
+            sorted(n.get("content") for n in res.json().get("results")),
+            sorted([large, small])
+        )
+        res = self.client.get(reverse("notes:search"), {"q": "compressible"})
+        self.assertEqual(len(res.json().get("results")), 1)
+
+    @override_settings(NOTES_TOMBSTONE_RETENTION=timedelta(0))
+    def test190_prune_tombstones(self):
+        """
+        GIVEN a board or group with a deleted note
+        WHEN the tombstones older than the retention window are pruned
+        THEN the tombstone of the note should be gone
+            AND changes since before the window should be rejected
+        """
+        parent = self.group or self.board
+        since = now()
+        url = self._get_url()
+
+        self.client.force_authenticate(user=self.user)
+        self.client.put(url, {"content": "Deleted"})
+        self.client.delete(url)
+        self.assertEqual(
+            len(list(parent.notes_storage.iter_tombstones(parent))), 1
+        )
+
+        call_command("prune_tombstones", stdout=StringIO())
+        self.assertEqual(list(parent.notes_storage.iter_tombstones(parent)), [])
+
+        if not self.group:
+            changes_url = reverse("notes:boards-changes", args=(self.board.pk,))
+        else:
+            changes_url = reverse(
+                "notes:groups-changes", args=(self.board.pk, self.group.pk)
+            )
+        res = self.client.get(changes_url, {"since": since.isoformat()})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
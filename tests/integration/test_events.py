@@ -177,7 +177,7 @@ class TestEvents(APITestCase):
             tz=60
         )
         res = self.client.get(url)
-        assert len(res.json()) == 1
+        assert len(res.json().get("results")) == 1
 
         # Now we check for the first month of the next year,
         # This should still work because the 'end_date' of the event,
@@ -190,4 +190,4 @@ class TestEvents(APITestCase):
             tz=60
         )
         res = self.client.get(url)
-        assert len(res.json()) == 1
+        assert len(res.json().get("results")) == 1
@@ -115,7 +115,7 @@ class TestUsers(APITestCase):
         self.client.force_authenticate(user=self.user)
         res = self.client.get(url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        content = res.json()
+        content = res.json().get("results")
         # Response body should be an array / list,
         # containing only one user - the logged in one
         self.assertEqual(type(content), list)